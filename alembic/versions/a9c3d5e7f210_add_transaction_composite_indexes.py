@@ -0,0 +1,30 @@
+"""add transaction composite indexes
+
+Revision ID: a9c3d5e7f210
+Revises: f1b92a7c4e08
+Create Date: 2026-08-30 12:41:17.550389
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9c3d5e7f210'
+down_revision: Union[str, Sequence[str], None] = 'f1b92a7c4e08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_transactions_status_created_at', 'transactions', ['status', 'created_at'], unique=False)
+    op.create_index('ix_transactions_user_id_created_at', 'transactions', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_transactions_user_id_created_at', table_name='transactions')
+    op.drop_index('ix_transactions_status_created_at', table_name='transactions')
@@ -0,0 +1,46 @@
+"""add server side timestamp defaults
+
+Revision ID: b7d1e3f59c42
+Revises: a9c3d5e7f210
+Create Date: 2026-08-30 13:05:44.218763
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d1e3f59c42'
+down_revision: Union[str, Sequence[str], None] = 'a9c3d5e7f210'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_TIMESTAMP_COLUMNS = [
+    ('chats', 'created_at'),
+    ('messages', 'created_at'),
+    ('generated_audio', 'created_at'),
+    ('generated_images', 'created_at'),
+    ('generated_videos', 'created_at'),
+    ('generated_videos', 'updated_at'),
+    ('packages', 'created_at'),
+    ('packages', 'updated_at'),
+    ('transactions', 'created_at'),
+    ('users', 'created_at'),
+    ('users', 'updated_at'),
+    ('wallets', 'updated_at'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in _TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=sa.func.now())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in _TIMESTAMP_COLUMNS:
+        op.alter_column(table, column, server_default=None)
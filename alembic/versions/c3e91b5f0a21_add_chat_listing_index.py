@@ -0,0 +1,28 @@
+"""add chat listing index
+
+Revision ID: c3e91b5f0a21
+Revises: bd87a116edce
+Create Date: 2026-08-30 09:15:22.104873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e91b5f0a21'
+down_revision: Union[str, Sequence[str], None] = 'bd87a116edce'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chats_user_id_created_at', 'chats', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_user_id_created_at', table_name='chats')
@@ -0,0 +1,39 @@
+"""convert message attachments to jsonb
+
+Revision ID: c8e2f4a61d73
+Revises: b7d1e3f59c42
+Create Date: 2026-08-30 13:28:09.664512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c8e2f4a61d73'
+down_revision: Union[str, Sequence[str], None] = 'b7d1e3f59c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column(
+        'messages', 'attachments',
+        type_=postgresql.JSONB(),
+        postgresql_using='attachments::jsonb',
+        server_default=sa.text("'[]'::jsonb"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.alter_column(
+        'messages', 'attachments',
+        type_=sa.JSON(),
+        postgresql_using='attachments::json',
+        server_default=None,
+    )
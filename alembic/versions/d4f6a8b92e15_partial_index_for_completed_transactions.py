@@ -0,0 +1,34 @@
+"""partial index for completed transactions
+
+Revision ID: d4f6a8b92e15
+Revises: c8e2f4a61d73
+Create Date: 2026-08-30 13:52:31.907284
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6a8b92e15'
+down_revision: Union[str, Sequence[str], None] = 'c8e2f4a61d73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_transactions_completed_created_at', 'transactions', ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status = 'completed'"),
+    )
+    op.drop_index('ix_transactions_status_created_at', table_name='transactions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index('ix_transactions_status_created_at', 'transactions', ['status', 'created_at'], unique=False)
+    op.drop_index('ix_transactions_completed_created_at', table_name='transactions')
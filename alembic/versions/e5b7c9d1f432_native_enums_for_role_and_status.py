@@ -0,0 +1,83 @@
+"""native enums for role and status columns
+
+Revision ID: e5b7c9d1f432
+Revises: d4f6a8b92e15
+Create Date: 2026-08-30 14:10:27.481935
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b7c9d1f432'
+down_revision: Union[str, Sequence[str], None] = 'd4f6a8b92e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+_ENUMS = [
+    ('messages', 'role', 'message_role',
+     ('system', 'user', 'assistant', 'ai')),
+    ('transactions', 'status', 'transaction_status',
+     ('pending', 'completed', 'failed')),
+    ('generated_videos', 'status', 'video_status',
+     ('processing', 'processing_external', 'completed', 'failed')),
+]
+
+# Partial indexes whose WHERE clause references transactions.status.
+# They must be dropped before the ALTER ... USING and recreated after:
+# Postgres would otherwise rebuild them with the varchar-era predicate
+# ((status)::text = 'completed'::text), which the planner can never
+# match against the enum column. The same DDL is valid on both sides of
+# the migration (the literal coerces to whichever type status holds).
+_STATUS_PARTIAL_INDEXES = [
+    ('ix_transactions_completed_created_at',
+     "CREATE INDEX ix_transactions_completed_created_at "
+     "ON transactions (created_at) "
+     "WHERE status = 'completed'"),
+    ('ix_transactions_day_completed',
+     "CREATE INDEX ix_transactions_day_completed "
+     "ON transactions (date_trunc('day', created_at AT TIME ZONE 'UTC')) "
+     "WHERE status = 'completed'"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    for table, column, type_name, values in _ENUMS:
+        enum_type = postgresql.ENUM(*values, name=type_name)
+        enum_type.create(bind, checkfirst=True)
+        if table == 'transactions':
+            for index_name, _ in _STATUS_PARTIAL_INDEXES:
+                op.drop_index(index_name, table_name='transactions')
+        op.alter_column(
+            table, column,
+            type_=enum_type,
+            postgresql_using=f'{column}::{type_name}',
+        )
+        if table == 'transactions':
+            for _, create_ddl in _STATUS_PARTIAL_INDEXES:
+                op.execute(create_ddl)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    for table, column, type_name, values in _ENUMS:
+        if table == 'transactions':
+            for index_name, _ in _STATUS_PARTIAL_INDEXES:
+                op.drop_index(index_name, table_name='transactions')
+        op.alter_column(
+            table, column,
+            type_=sa.String(),
+            postgresql_using=f'{column}::text',
+        )
+        if table == 'transactions':
+            for _, create_ddl in _STATUS_PARTIAL_INDEXES:
+                op.execute(create_ddl)
+        postgresql.ENUM(name=type_name).drop(bind, checkfirst=True)
@@ -0,0 +1,44 @@
+"""add trend expression indexes
+
+Revision ID: e7a42d9c6b53
+Revises: c3e91b5f0a21
+Create Date: 2026-08-30 10:02:48.331907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a42d9c6b53'
+down_revision: Union[str, Sequence[str], None] = 'c3e91b5f0a21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Expression indexes matching the date_trunc('day', ...) group-bys in
+    # the admin overview trends. The transactions index is partial on
+    # status='completed' to mirror the query's WHERE clause.
+    # date_trunc(text, timestamptz) is only STABLE (it depends on the
+    # session timezone), so the indexed expression pins the zone with
+    # AT TIME ZONE 'UTC' to get an IMMUTABLE expression; the admin
+    # queries group by the identical expression.
+    op.execute(
+        "CREATE INDEX ix_transactions_day_completed "
+        "ON transactions (date_trunc('day', created_at AT TIME ZONE 'UTC')) "
+        "WHERE status = 'completed'"
+    )
+    op.execute(
+        "CREATE INDEX ix_users_day "
+        "ON users (date_trunc('day', created_at AT TIME ZONE 'UTC'))"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX ix_users_day")
+    op.execute("DROP INDEX ix_transactions_day_completed")
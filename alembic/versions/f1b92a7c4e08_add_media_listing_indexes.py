@@ -0,0 +1,34 @@
+"""add media listing indexes
+
+Revision ID: f1b92a7c4e08
+Revises: e7a42d9c6b53
+Create Date: 2026-08-30 11:24:05.918264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b92a7c4e08'
+down_revision: Union[str, Sequence[str], None] = 'e7a42d9c6b53'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_generated_audio_user_id_created_at', 'generated_audio', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_generated_images_user_id_created_at', 'generated_images', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_generated_videos_user_id_created_at', 'generated_videos', ['user_id', 'created_at'], unique=False)
+    op.create_index('ix_generated_audio_source_message_id', 'generated_audio', ['source_message_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_generated_audio_source_message_id', table_name='generated_audio')
+    op.drop_index('ix_generated_videos_user_id_created_at', table_name='generated_videos')
+    op.drop_index('ix_generated_images_user_id_created_at', table_name='generated_images')
+    op.drop_index('ix_generated_audio_user_id_created_at', table_name='generated_audio')
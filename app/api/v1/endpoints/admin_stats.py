@@ -1,75 +1,114 @@
-from fastapi import APIRouter, Depends
+import logging
+
+from fastapi import APIRouter, Depends, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, cast, Date
+from sqlalchemy import select, func
 from datetime import datetime, timedelta, timezone
+import redis.asyncio as redis
 from app.schemas.admin_stats import AdminOverviewStats
 
 from app.core.database import get_db
+from app.core.redis import get_redis
 from app.models import User, Message, GeneratedImage, GeneratedAudio, GeneratedVideo, Chat, Transaction
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.get("/overview", response_model=AdminOverviewStats)
-async def get_admin_overview(db: AsyncSession = Depends(get_db)):
-    # Calculate Revenue
-    revenue_stmt = select(func.coalesce(func.sum(Transaction.amount), 0)).where(Transaction.status == "completed")
-    revenue = await db.scalar(revenue_stmt)
+# The overview is expensive (full-history aggregates) but changes slowly,
+# so repeat dashboard hits are served from Redis for a short window.
+OVERVIEW_CACHE_KEY = "admin:stats:overview"
+OVERVIEW_CACHE_TTL = 60  # seconds
 
-    # Calculate Counts Separately
-    user_count = await db.scalar(select(func.count(User.id)))
-    chat_count = await db.scalar(select(func.count(Chat.id)))
+# One Rust-side validate + dump for the whole stats payload (including
+# the trend lists); cache hits replay the serialized bytes untouched.
+_OVERVIEW_ADAPTER = TypeAdapter(AdminOverviewStats)
 
-    # Costs & Tokens (Message table only - this is safe to keep together)
-    ai_metrics_stmt = select(
-        func.coalesce(func.sum(Message.tokens), 0).label("tokens"),
-        func.coalesce(func.sum(Message.cost), 0).label("msg_cost")
+@router.get("/overview", response_model=AdminOverviewStats)
+async def get_admin_overview(
+    db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis)
+):
+    # Serve from cache when fresh (identical for every admin)
+    try:
+        cached = await redis_client.get(OVERVIEW_CACHE_KEY)
+        if cached:
+            return Response(content=cached, media_type="application/json")
+    except Exception as e:
+        logger.warning(f"Overview cache read failed: {e}")
+
+    # All global aggregates as scalar subqueries in ONE statement.
+    # Postgres computes the 9 values in a single plan, so we pay one
+    # network round-trip instead of nine sequential ones.
+    totals_stmt = select(
+        select(func.coalesce(func.sum(Transaction.amount), 0))
+        .where(Transaction.status == "completed")
+        .scalar_subquery().label("revenue"),
+        select(func.count(User.id)).scalar_subquery().label("user_count"),
+        select(func.count(Chat.id)).scalar_subquery().label("chat_count"),
+        select(func.coalesce(func.sum(Message.tokens), 0)).scalar_subquery().label("tokens"),
+        select(func.coalesce(func.sum(Message.cost), 0)).scalar_subquery().label("msg_cost"),
+        select(func.count(GeneratedImage.id)).scalar_subquery().label("img_count"),
+        select(func.count(GeneratedAudio.id)).scalar_subquery().label("audio_count"),
+        select(func.count(GeneratedVideo.id)).scalar_subquery().label("video_count"),
+        select(func.coalesce(func.sum(GeneratedImage.cost), 0)).scalar_subquery().label("img_cost"),
+        select(func.coalesce(func.sum(GeneratedAudio.cost), 0)).scalar_subquery().label("aud_cost"),
+        select(func.coalesce(func.sum(GeneratedVideo.cost), 0)).scalar_subquery().label("vid_cost"),
     )
-    ai_metrics = (await db.execute(ai_metrics_stmt)).first()
+    totals = (await db.execute(totals_stmt)).first()
 
-    # Media Counts
-    img_count = await db.scalar(select(func.count(GeneratedImage.id)))
-    audio_count = await db.scalar(select(func.count(GeneratedAudio.id)))
-    video_count = await db.scalar(select(func.count(GeneratedVideo.id)))
-
-    # Calculate Total AI Cost
-    img_cost = await db.scalar(select(func.coalesce(func.sum(GeneratedImage.cost), 0)))
-    aud_cost = await db.scalar(select(func.coalesce(func.sum(GeneratedAudio.cost), 0)))
-    vid_cost = await db.scalar(select(func.coalesce(func.sum(GeneratedVideo.cost), 0)))
-    
-    total_ai_cost = ai_metrics.msg_cost + img_cost + aud_cost + vid_cost
+    total_ai_cost = totals.msg_cost + totals.img_cost + totals.aud_cost + totals.vid_cost
 
     # Time-Series Data (Last 30 Days)
     thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
     
     # Revenue Trend
+    # date_trunc over the UTC-pinned timestamp matches the immutable
+    # expression indexes on transactions/users exactly, so these
+    # group-bys run as index range scans.
     rev_trend_stmt = (
-        select(cast(Transaction.created_at, Date).label("day"), func.sum(Transaction.amount))
+        select(
+            func.date_trunc("day", func.timezone("UTC", Transaction.created_at)).label("day"),
+            func.sum(Transaction.amount),
+        )
         .where(Transaction.status == "completed", Transaction.created_at >= thirty_days_ago)
         .group_by("day")
         .order_by("day")
     )
     rev_trend_res = await db.execute(rev_trend_stmt)
-    revenue_trend = [{"date": str(r[0]), "value": r[1]} for r in rev_trend_res.all()]
+    revenue_trend = [{"date": str(r[0].date()), "value": r[1]} for r in rev_trend_res.all()]
 
     # User Growth Trend
     user_trend_stmt = (
-        select(cast(User.created_at, Date).label("day"), func.count(User.id))
+        select(
+            func.date_trunc("day", func.timezone("UTC", User.created_at)).label("day"),
+            func.count(User.id),
+        )
         .where(User.created_at >= thirty_days_ago)
         .group_by("day")
         .order_by("day")
     )
     user_trend_res = await db.execute(user_trend_stmt)
-    user_growth_trend = [{"date": str(u[0]), "value": u[1]} for u in user_trend_res.all()]
+    user_growth_trend = [{"date": str(u[0].date()), "value": u[1]} for u in user_trend_res.all()]
 
-    return {
-        "total_revenue": revenue,
-        "total_users": user_count,
-        "total_chats": chat_count,
-        "total_images_generated": img_count,
-        "total_audio_generated": audio_count,
-        "total_videos_generated": video_count,
-        "total_tokens_consumed": ai_metrics.tokens,
+    stats = {
+        "total_revenue": totals.revenue,
+        "total_users": totals.user_count,
+        "total_chats": totals.chat_count,
+        "total_images_generated": totals.img_count,
+        "total_audio_generated": totals.audio_count,
+        "total_videos_generated": totals.video_count,
+        "total_tokens_consumed": totals.tokens,
         "total_ai_cost": total_ai_cost,
         "revenue_trend": revenue_trend,
         "user_growth_trend": user_growth_trend
-    }
\ No newline at end of file
+    }
+
+    payload = _OVERVIEW_ADAPTER.dump_json(_OVERVIEW_ADAPTER.validate_python(stats))
+
+    try:
+        await redis_client.setex(OVERVIEW_CACHE_KEY, OVERVIEW_CACHE_TTL, payload)
+    except Exception as e:
+        logger.warning(f"Overview cache write failed: {e}")
+
+    return Response(content=payload, media_type="application/json")
\ No newline at end of file
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import exists
 from sqlalchemy.future import select
-from sqlalchemy.exc import OperationalError, InterfaceError
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
+from sqlalchemy.ext.asyncio import AsyncSession
+from google.auth import jwt as google_jwt
+from cachetools import TTLCache, cached
+import requests as http_requests
 import secrets
 import asyncio
 import logging
 
-from app.core.database import async_session_maker
+from app.core.database import get_db, async_session_maker
 from app.models.user import User, Wallet
 from app.schemas.user import UserCreate, Token, UserLogin, GoogleLogin
 from app.core.security import get_password_hash, verify_password, create_access_token
@@ -16,109 +18,107 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Google token verification
+#
+# `id_token.verify_oauth2_token` re-downloads Google's public certs on every
+# login (the google-auth transport does not cache them), costing an HTTPS
+# round-trip per call. We fetch the certs ourselves and keep them for an hour
+# so warm logins validate locally.
 
-async def execute_with_retry(
-    operation,
-    max_retries: int = 3,
-    base_delay: float = 1.0
-):
+_GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+_GOOGLE_ISSUERS = {"accounts.google.com", "https://accounts.google.com"}
+
+
+@cached(TTLCache(maxsize=1, ttl=3600))
+def _get_google_certs() -> dict:
+    """Fetch (and cache) Google's OAuth2 public certificates."""
+    response = http_requests.get(_GOOGLE_CERTS_URL, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+def verify_google_token(token: str) -> dict:
     """
-    Execute a database operation with automatic retry on connection failures.
-    Uses exponential backoff between retries.
+    Verify a Google ID token against the cached certs.
+    Raises ValueError on any validation failure (same contract as
+    `id_token.verify_oauth2_token`).
     """
-    last_exception = None
-    
-    for attempt in range(max_retries):
-        try:
-            return await operation()
-        except (
-            OperationalError,
-            InterfaceError,
-            TimeoutError,
-            asyncio.CancelledError,
-            ConnectionRefusedError,
-            OSError
-        ) as e:
-            last_exception = e
-            if attempt < max_retries - 1:
-                wait_time = base_delay * (2 ** attempt)
-                logger.warning(
-                    f"Database operation failed (attempt {attempt + 1}/{max_retries}), "
-                    f"retrying in {wait_time}s: {type(e).__name__}: {str(e)}"
-                )
-                await asyncio.sleep(wait_time)
-            else:
-                logger.error(
-                    f"Database operation failed after {max_retries} attempts: "
-                    f"{type(e).__name__}: {str(e)}"
-                )
-    
-    raise HTTPException(
-        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-        detail="Database temporarily unavailable. Please try again in a few moments."
+    id_info = google_jwt.decode(
+        token,
+        certs=_get_google_certs(),
+        audience=settings.GOOGLE_CLIENT_ID,
     )
+    if id_info.get("iss") not in _GOOGLE_ISSUERS:
+        raise ValueError(f"Invalid token issuer: {id_info.get('iss')}")
+    return id_info
 
 
-async def get_user_by_email(email: str) -> User | None:
-    """Get user by email with retry logic."""
-    async def operation():
-        async with async_session_maker() as db:
-            result = await db.execute(select(User).where(User.email == email))
-            return result.scalar_one_or_none()
-    
-    return await execute_with_retry(operation)
+async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
+    """Get user by email using the request-scoped session."""
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+
+async def email_exists(db: AsyncSession, email: str) -> bool:
+    """
+    Cheap existence probe on users.email — a single index lookup that
+    avoids fetching and materializing the full User row.
+    """
+    return bool(await db.scalar(select(exists().where(User.email == email))))
 
 
 async def create_user_with_wallet(
+    db: AsyncSession,
     email: str,
     hashed_password: str,
     full_name: str,
     is_active: bool = True
 ) -> User:
-    """Create a new user with wallet using retry logic."""
-    async def operation():
-        async with async_session_maker() as db:
-            # Create User
-            new_user = User(
-                email=email,
-                hashed_password=hashed_password,
-                full_name=full_name,
-                is_active=is_active
-            )
-            db.add(new_user)
-            await db.commit()
-            await db.refresh(new_user)
-            
-            # Create Wallet
-            wallet = Wallet(user_id=new_user.id, credits=10.0)
-            db.add(wallet)
-            await db.commit()
-            
-            return new_user
-    
-    return await execute_with_retry(operation)
+    """Create a new user with wallet in a single transaction."""
+    # Create User
+    new_user = User(
+        email=email,
+        hashed_password=hashed_password,
+        full_name=full_name,
+        is_active=is_active
+    )
+    db.add(new_user)
+    # Flush assigns new_user.id without the cost of an intermediate commit
+    await db.flush()
+
+    # Create Wallet and commit both rows together
+    wallet = Wallet(user_id=new_user.id, credits=10.0)
+    db.add(wallet)
+    await db.commit()
+    await db.refresh(new_user)
+
+    return new_user
 
 
 # Auth Endpoints
 
 @router.post("/signup", response_model=Token)
-async def signup(user_in: UserCreate):
+async def signup(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
     """
     Register a new user with email and password.
     """
     try:
         # Check if user exists
-        existing_user = await get_user_by_email(user_in.email)
-        if existing_user:
+        if await email_exists(db, user_in.email):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
 
+        # Hash in a worker thread: bcrypt/argon2 takes ~100ms of CPU and
+        # would otherwise block the event loop for every other request.
+        hashed_pw = await asyncio.to_thread(get_password_hash, user_in.password)
+
         # Create User with Wallet
         new_user = await create_user_with_wallet(
+            db,
             email=user_in.email,
-            hashed_password=get_password_hash(user_in.password),
+            hashed_password=hashed_pw,
             full_name="New User",
             is_active=True
         )
@@ -138,16 +138,18 @@ async def signup(user_in: UserCreate):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_in: UserLogin):
+async def login(user_in: UserLogin, db: AsyncSession = Depends(get_db)):
     """
     Login with email and password.
     """
     try:
         # Get user from database
-        user = await get_user_by_email(user_in.email)
+        user = await get_user_by_email(db, user_in.email)
         
-        # Verify credentials
-        if not user or not verify_password(user_in.password, user.hashed_password):
+        # Verify credentials (hash check runs in a worker thread, off the loop)
+        if not user or not await asyncio.to_thread(
+            verify_password, user_in.password, user.hashed_password
+        ):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect email or password"
@@ -168,18 +170,14 @@ async def login(user_in: UserLogin):
 
 
 @router.post("/google", response_model=Token)
-async def google_login(login_data: GoogleLogin):
+async def google_login(login_data: GoogleLogin, db: AsyncSession = Depends(get_db)):
     """
     Login or register using Google OAuth2.
     """
     try:
-        # Verify the Token with Google
+        # Verify the Token with Google (certs are cached locally)
         try:
-            id_info = id_token.verify_oauth2_token(
-                login_data.token,
-                google_requests.Request(),
-                settings.GOOGLE_CLIENT_ID
-            )
+            id_info = verify_google_token(login_data.token)
         except ValueError as e:
             logger.warning(f"Invalid Google token: {str(e)}")
             raise HTTPException(
@@ -197,16 +195,16 @@ async def google_login(login_data: GoogleLogin):
                 detail="Invalid Google Token: Email missing"
             )
 
-        # Check if User Exists in DB
-        user = await get_user_by_email(email)
-
-        if not user:
+        # Check if User Exists in DB (existence probe only — the token
+        # subject is the verified Google email either way)
+        if not await email_exists(db, email):
             # Auto-Register New User
             logger.info(f"Creating new user from Google login: {email}")
             random_password = secrets.token_urlsafe(32)
-            hashed_pw = get_password_hash(random_password)
-            
-            user = await create_user_with_wallet(
+            hashed_pw = await asyncio.to_thread(get_password_hash, random_password)
+
+            await create_user_with_wallet(
+                db,
                 email=email,
                 hashed_password=hashed_pw,
                 full_name=name,
@@ -214,7 +212,7 @@ async def google_login(login_data: GoogleLogin):
             )
 
         # Create Access Token
-        access_token = create_access_token(data={"sub": user.email})
+        access_token = create_access_token(data={"sub": email})
         return {"access_token": access_token, "token_type": "bearer"}
 
     except HTTPException:
@@ -235,17 +233,14 @@ async def health_check():
     Check if the auth service and database are healthy.
     """
     try:
-        # Try to connect to database
-        async def check_db():
-            async with async_session_maker() as db:
-                await db.execute(select(1))
-                return True
-        
-        db_healthy = await execute_with_retry(check_db, max_retries=1, base_delay=0.5)
-        
+        # Single probe, no retries: a real outage should surface
+        # immediately rather than hold the request open with backoff.
+        async with async_session_maker() as db:
+            await db.execute(select(1))
+
         return {
             "status": "healthy",
-            "database": "connected" if db_healthy else "disconnected"
+            "database": "connected"
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -1,22 +1,22 @@
 import uuid
 import asyncio
-import json
+import orjson
 from decimal import Decimal
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, Response, status
 from fastapi.websockets import WebSocketState
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError, InterfaceError, OperationalError
-from sqlalchemy import select, desc, update
-from pydantic import BaseModel, ValidationError
+from sqlalchemy import select, delete, desc, update, bindparam, func
+from pydantic import BaseModel, TypeAdapter, ValidationError
 import redis.asyncio as redis
 import logging
 
 from app.core.database import get_db, async_session_maker
 from app.core.redis import get_redis, ChatCache
-from app.core.security import verify_token_socket, get_current_user
+from app.core.security import get_current_user, decode_token_subject
 from app.models.user import User, Wallet
 from app.models.chat import Chat, Message
 from app.services.llm.factory import LLMFactory
@@ -24,6 +24,7 @@ from app.services.llm.router import ModelRouter
 from app.services.llm.usage import Usage
 from app.services.llm.schema import ChatMessage, Attachment
 from app.services.file_processing import process_file
+from app.services.batching import message_batcher
 
 
 logger = logging.getLogger(__name__)
@@ -70,7 +71,9 @@ async def safe_websocket_send(websocket: WebSocket, data: dict) -> bool:
     """Safely send data through WebSocket, handling disconnection."""
     try:
         if websocket.client_state != WebSocketState.DISCONNECTED:
-            await websocket.send_json(data)
+            # orjson serializes in C, well ahead of stdlib json on the
+            # per-token frames the streaming loop produces.
+            await websocket.send_text(orjson.dumps(data).decode())
             return True
     except (WebSocketDisconnect, ConnectionResetError, RuntimeError) as e:
         logger.debug(f"WebSocket send failed (client disconnected): {type(e).__name__}")
@@ -88,6 +91,13 @@ async def safe_websocket_close(websocket: WebSocket, code: int = 1000, reason: s
         pass  # Already closed or connection lost
 
 
+# Streaming: coalesce tiny LLM chunks into fewer WebSocket frames.
+# A frame is flushed once the buffer reaches this many characters or the
+# flush interval elapses, whichever comes first.
+STREAM_FLUSH_CHARS = 64
+STREAM_FLUSH_SECONDS = 0.02
+
+
 # Schemas
 
 class AttachmentSchema(BaseModel):
@@ -125,9 +135,119 @@ class UserMessagePayload(BaseModel):
     attachments: Optional[List[AttachmentSchema]] = []
 
 
+# Built once at import: validate_json parses raw frames straight into the
+# model in pydantic-core without an intermediate Python dict.
+_PAYLOAD_ADAPTER = TypeAdapter(UserMessagePayload)
+
+# List adapters for the GET endpoints: validate straight off the ORM rows
+# and dump UTF-8 bytes in pydantic-core, skipping FastAPI's
+# jsonable_encoder + response_model re-validation pipeline.
+_MSG_LIST_ADAPTER = TypeAdapter(List[MessageSchema])
+_CHAT_LIST_ADAPTER = TypeAdapter(List[ChatSchema])
+
+
+# Statement templates built once at import; per-request calls bind
+# parameters instead of rebuilding the expression tree every time.
+_CHAT_OWN_STMT = select(Chat).where(
+    Chat.id == bindparam("cid"), Chat.user_id == bindparam("uid")
+)
+_HISTORY_STMT = (
+    select(Message)
+    .where(Message.chat_id == bindparam("cid"))
+    .order_by(Message.created_at.asc())
+)
+# Column-only select: the fallback just needs role/content, so skip ORM
+# hydration (identity map, attribute instrumentation) entirely.
+_RECENT_MSGS_STMT = (
+    select(Message.role, Message.content)
+    .where(Message.chat_id == bindparam("cid"))
+    .order_by(desc(Message.created_at))
+    .limit(10)
+)
+_USER_CHATS_STMT = (
+    select(Chat)
+    .where(Chat.user_id == bindparam("uid"))
+    .order_by(desc(Chat.created_at))
+)
+# Post-delivery debit: by the time this runs the response has already
+# been streamed, so the decrement must always land — GREATEST clamps the
+# balance at zero instead of guarding (a guard here would silently skip
+# the charge and hand out free turns to low-balance users). RETURNING
+# gives the new balance without a re-read, and the statement is keyed by
+# the wallet PK (captured at WS setup) so the UPDATE takes the
+# primary-key lookup path instead of the user_id index.
+_WALLET_DEBIT_STMT = (
+    update(Wallet)
+    .where(Wallet.id == bindparam("wid"))
+    .values(credits=func.greatest(Wallet.credits - bindparam("cost"), 0))
+    .returning(Wallet.credits)
+    .execution_options(synchronize_session=False)
+)
+
+
+async def _finalize_turn(
+    websocket: WebSocket,
+    wallet_id: int,
+    chat_id: uuid.UUID,
+    provider,
+    usage: Usage,
+    selected_model: str,
+    full_response: str,
+) -> None:
+    """
+    Debit the wallet and persist/cache the AI message for a finished turn.
+    Runs as a background task so none of this I/O delays the next receive.
+    """
+    try:
+        total_cost_to_user = provider.calculate_cost(usage, selected_model)
+
+        # Zero-cost turns (e.g. provider returned no tokens) skip the
+        # round trip entirely.
+        if total_cost_to_user > 0:
+            async with async_session_maker() as db:
+                new_balance = (await db.execute(
+                    _WALLET_DEBIT_STMT,
+                    {"wid": wallet_id, "cost": total_cost_to_user},
+                )).scalar_one_or_none()
+                await safe_db_commit(db)
+
+            if new_balance is None or new_balance <= 0:
+                # Balance is spent (clamped at zero): end the session so
+                # the user can't keep generating; reconnects are blocked
+                # by the credits > 0 check at WS setup.
+                await safe_websocket_send(websocket, {
+                    "type": "system",
+                    "event": "warning",
+                    "payload": "Balance exhausted. Please top up."
+                })
+                await safe_websocket_close(websocket, code=1000, reason="Insufficient credits")
+
+        # AI message insert + its cache append go through the batcher
+        await message_batcher.add_message(
+            chat_id=chat_id,
+            role="ai",
+            content=full_response,
+            model=selected_model,
+            tokens=usage.total_tokens,
+            cost=total_cost_to_user,
+            cache=True,
+        )
+
+        # Send cost info
+        await safe_websocket_send(websocket, {
+            "type": "system",
+            "event": "cost",
+            "payload": str(total_cost_to_user)
+        })
+
+    except Exception as e:
+        logger.error(f"Error in billing/saving: {e}")
+        # Don't fail completely - response was already sent
+
+
 # HTTP Endpoints (GETs)
 
-@router.get("/history/{chat_id}", response_model=List[MessageSchema])
+@router.get("/history/{chat_id}")
 async def get_chat_history(
     chat_id: str,
     db: AsyncSession = Depends(get_db),
@@ -136,22 +256,22 @@ async def get_chat_history(
     try:
         chat_uuid = uuid.UUID(chat_id)
     except ValueError:
-        return []
+        return Response(content=b"[]", media_type="application/json")
 
     result = await db.execute(
-        select(Chat).where(Chat.id == chat_uuid, Chat.user_id == current_user.id)
+        _CHAT_OWN_STMT, {"cid": chat_uuid, "uid": current_user.id}
     )
     chat = result.scalar_one_or_none()
 
     if not chat:
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    result = await db.execute(
-        select(Message)
-        .where(Message.chat_id == chat_uuid)
-        .order_by(Message.created_at.asc())
+    result = await db.execute(_HISTORY_STMT, {"cid": chat_uuid})
+    messages = _MSG_LIST_ADAPTER.validate_python(result.scalars().all())
+    return Response(
+        content=_MSG_LIST_ADAPTER.dump_json(messages),
+        media_type="application/json",
     )
-    return result.scalars().all()
 
 
 @router.delete("/{chat_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -169,18 +289,27 @@ async def delete_chat(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid chat ID format")
 
-    # Fetch Chat and verify ownership
-    result = await db.execute(
-        select(Chat).where(Chat.id == chat_uuid, Chat.user_id == current_user.id)
+    # Delete in two statements, one transaction: the ORM cascade would
+    # load every Message into memory and delete them row by row. Messages
+    # go first (no DB-level ON DELETE CASCADE) with ownership enforced via
+    # the subquery; RETURNING on the chat delete doubles as the 404 check.
+    await db.execute(
+        delete(Message).where(
+            Message.chat_id.in_(
+                select(Chat.id).where(Chat.id == chat_uuid, Chat.user_id == current_user.id)
+            )
+        )
     )
-    chat = result.scalar_one_or_none()
-
-    if not chat:
+    deleted = (await db.execute(
+        delete(Chat)
+        .where(Chat.id == chat_uuid, Chat.user_id == current_user.id)
+        .returning(Chat.id)
+    )).first()
+
+    if deleted is None:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Chat not found")
 
-    # Delete from DB
-    await db.delete(chat)
-    
     if not await safe_db_commit(db):
         raise HTTPException(status_code=500, detail="Failed to delete chat from database")
 
@@ -194,17 +323,17 @@ async def delete_chat(
 
 
 
-@router.get("/list", response_model=List[ChatSchema])
+@router.get("/list")
 async def get_user_chats(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Chat)
-        .where(Chat.user_id == current_user.id)
-        .order_by(desc(Chat.created_at))
+    result = await db.execute(_USER_CHATS_STMT, {"uid": current_user.id})
+    chats = _CHAT_LIST_ADAPTER.validate_python(result.scalars().all())
+    return Response(
+        content=_CHAT_LIST_ADAPTER.dump_json(chats),
+        media_type="application/json",
     )
-    return result.scalars().all()
 
 
 # WebSocket Endpoint
@@ -220,56 +349,86 @@ async def websocket_endpoint(
     WebSocket endpoint for real-time chat.
     Uses isolated database sessions for each operation to handle disconnections gracefully.
     """
+    # 0. Cheap pre-accept validation. A stateless JWT check and UUID parse
+    # reject abusive/stale clients before we grant a session or touch the
+    # DB pool at all.
+    token = websocket.query_params.get("token")
+    if not token or decode_token_subject(token) is None:
+        await safe_websocket_close(websocket, code=1008, reason="Invalid token")
+        return
+
+    chat_uuid: Optional[uuid.UUID] = None
+    if chat_id:
+        try:
+            chat_uuid = uuid.UUID(chat_id)
+        except ValueError:
+            chat_uuid = None
+
     await websocket.accept()
     cache = ChatCache(redis_client)
-    
+
     # Track connection state
     is_connected = True
-    user: Optional[User] = None
-    current_chat: Optional[Chat] = None
+    user_email: Optional[str] = None
     current_chat_id: Optional[uuid.UUID] = None
     wallet_id: Optional[int] = None
+    pending_finalizers: set = set()
 
     try:
-        # 1. Auth & Validation (using isolated session)
-        token = websocket.query_params.get("token")
-        if not token:
-            await safe_websocket_close(websocket, code=1008, reason="Missing token")
+        # 1-3. Setup lookups. User+wallet come back in ONE joined SELECT,
+        # and the optional chat/history prefetch doesn't depend on it, so
+        # the two queries run concurrently on separate sessions.
+        email = decode_token_subject(token)
+
+        async def load_user_and_wallet():
+            async with async_session_maker() as db:
+                result = await db.execute(
+                    select(User.id, User.email, Wallet.id, Wallet.credits)
+                    .outerjoin(Wallet, Wallet.user_id == User.id)
+                    .where(User.email == email)
+                )
+                return result.first()
+
+        async def load_chat_with_history():
+            # One query validates ownership AND prefetches the last 10
+            # messages, instead of a chat SELECT now plus a history SELECT
+            # on the first turn.
+            if not chat_uuid:
+                return []
+            async with async_session_maker() as db:
+                result = await db.execute(
+                    select(Chat.id, Message.role, Message.content)
+                    .join(User, User.id == Chat.user_id)
+                    .outerjoin(Message, Message.chat_id == Chat.id)
+                    .where(Chat.id == chat_uuid, User.email == email)
+                    .order_by(desc(Message.created_at))
+                    .limit(10)
+                )
+                return result.all()
+
+        user_row, rows = await asyncio.gather(
+            load_user_and_wallet(), load_chat_with_history()
+        )
+
+        if not user_row:
+            await safe_websocket_close(websocket, code=1008, reason="Invalid token")
             return
 
-        async with async_session_maker() as db:
-            user = await verify_token_socket(token, db)
-            if not user:
-                await safe_websocket_close(websocket, code=1008, reason="Invalid token")
-                return
-            
-            # Store user ID for later use (don't keep the ORM object across sessions)
-            user_id = user.id
-            user_email = user.email
-
-            # 2. Initial Wallet Check (Read Only)
-            result = await db.execute(select(Wallet).where(Wallet.user_id == user_id))
-            wallet = result.scalar_one_or_none()
-
-            if not wallet or wallet.credits <= Decimal("0.0"):
-                await safe_websocket_send(websocket, {"type": "error", "message": "Insufficient credits."})
-                await safe_websocket_close(websocket, code=1008)
-                return
-            
-            wallet_id = wallet.id
-
-            # 3. Chat Loading
-            if chat_id:
-                try:
-                    chat_uuid = uuid.UUID(chat_id)
-                    result = await db.execute(
-                        select(Chat).where(Chat.id == chat_uuid, Chat.user_id == user_id)
-                    )
-                    existing_chat = result.scalar_one_or_none()
-                    if existing_chat:
-                        current_chat_id = existing_chat.id
-                except ValueError:
-                    pass
+        user_id, user_email, wallet_id, wallet_credits = user_row
+
+        if wallet_id is None or wallet_credits <= Decimal("0.0"):
+            await safe_websocket_send(websocket, {"type": "error", "message": "Insufficient credits."})
+            await safe_websocket_close(websocket, code=1008)
+            return
+
+        preloaded_history: List[ChatMessage] = []
+        if rows:
+            current_chat_id = rows[0][0]
+            preloaded_history = [
+                ChatMessage.from_text(role, content)
+                for _, role, content in reversed(rows)
+                if role is not None
+            ]
 
         logger.info(f"WebSocket connected for user: {user_email}")
 
@@ -281,16 +440,15 @@ async def websocket_endpoint(
                 
                 # Parse User JSON
                 try:
-                    payload_data = json.loads(raw_data)
-                    payload = UserMessagePayload(**payload_data)
-                    
+                    payload = _PAYLOAD_ADAPTER.validate_json(raw_data)
+
                     if payload.type != "user_message":
-                        continue 
-                    
+                        continue
+
                     user_text = payload.content
                     raw_attachments = payload.attachments
-                    
-                except (json.JSONDecodeError, ValidationError) as e:
+
+                except ValidationError as e:
                     logger.error(f"Validation error: {e}")
                     await safe_websocket_send(websocket, {"type": "error", "message": "Invalid message format"})
                     continue
@@ -313,12 +471,13 @@ async def websocket_endpoint(
 
                         new_chat = Chat(user_id=user_id, title=title)
                         db.add(new_chat)
-                        
+
+                        # Commit now: message rows go through the batcher on a
+                        # separate session, so the chat row must already exist.
                         if not await safe_db_commit(db):
                             await safe_websocket_send(websocket, {"type": "error", "message": "Failed to create chat"})
                             continue
-                        
-                        await safe_db_refresh(db, new_chat)
+
                         current_chat_id = new_chat.id
                         
                         # Send the new ID back to frontend
@@ -341,39 +500,40 @@ async def websocket_endpoint(
                         is_connected = False
                         break
 
-                    # Prepare Attachments for LLM
+                    # Attachments, one pass: collect the DB metadata dicts and
+                    # the Redis ids together, then resolve the heavy contents
+                    # in a single pipelined round-trip.
                     current_attachments_for_llm = []
-                    
-                    if raw_attachments:
-                        for att in raw_attachments:
-                            # Use dot notation for Pydantic models
-                            file_id = att.id 
-                            
-                            if file_id:
-                                # Fetch heavy content from Redis
-                                file_data = await cache.get_temp_file(file_id)
-                                
-                                if file_data:
-                                    current_attachments_for_llm.append(Attachment(
-                                        type=file_data["type"],
-                                        content=file_data["content"],
-                                        mime_type=file_data.get("mime_type")
-                                    ))
-
-                    # Prepare Metadata for Database
                     metadata_attachments_for_db = []
+
                     if raw_attachments:
+                        file_ids = []
                         for att in raw_attachments:
-                            # Use dot notation or .model_dump()/.dict()
                             metadata_attachments_for_db.append({
                                 "name": att.name,
                                 "type": att.type,
                                 "size": att.size,
                                 "mime_type": att.mime_type
                             })
-
-                    # Save User Message to DB
-                    user_msg = Message(
+                            if att.id:
+                                file_ids.append(att.id)
+
+                        current_attachments_for_llm = [
+                            Attachment(
+                                type=file_data["type"],
+                                content=file_data["content"],
+                                mime_type=file_data.get("mime_type")
+                            )
+                            for file_data in await cache.get_temp_files(file_ids)
+                            if file_data
+                        ]
+
+                    # Save User Message via the shared batcher: inserts from
+                    # concurrent sessions land in one executemany. The Redis
+                    # append+history fetch stays synchronous because this
+                    # turn needs the history (cache=False avoids a double
+                    # Redis write).
+                    await message_batcher.add_message(
                         chat_id=current_chat_id,
                         role="user",
                         content=user_text,
@@ -381,43 +541,29 @@ async def websocket_endpoint(
                         attachments=metadata_attachments_for_db,
                     )
 
-                    db.add(user_msg)
-                    if not await safe_db_commit(db):
-                        await safe_websocket_send(websocket, {"type": "error", "message": "Failed to save message"})
-
-                    # Add to Cache
-                    try:
-                        await cache.add_message(str(current_chat_id), "user", user_text)
-                    except Exception:
-                        pass
-
-                    # Context Fetching
                     conversation_history: List[ChatMessage] = []
                     try:
-                        conversation_history = await cache.get_history(str(current_chat_id), limit=10)
+                        conversation_history = await cache.add_message_and_get_history(
+                            str(current_chat_id), "user", user_text, limit=10
+                        )
                     except Exception:
                         pass
 
                     if not conversation_history:
-                        result = await db.execute(
-                            select(Message)
-                            .where(Message.chat_id == current_chat_id)
-                            .order_by(desc(Message.created_at))
-                            .limit(10)
-                        )
-                        msgs = result.scalars().all()
-                        for msg in reversed(msgs):
-                            conversation_history.append(ChatMessage.from_text(msg.role, msg.content))
-
-                    # Parse Attachments for CURRENT message context
-                    current_attachments = []
-                    for att in raw_attachments:
-                        if "type" in att and "content" in att:
-                            current_attachments.append(Attachment(
-                                type=att["type"],
-                                content=att["content"],
-                                mime_type=att.get("mime_type")
-                            ))
+                        if preloaded_history:
+                            # History fetched during the connect query
+                            conversation_history = preloaded_history
+                        else:
+                            result = await db.execute(
+                                _RECENT_MSGS_STMT, {"cid": current_chat_id}
+                            )
+                            rows = result.all()
+                            # Single-pass build in chronological order
+                            conversation_history = [
+                                ChatMessage.from_text(role, content)
+                                for role, content in rows[::-1]
+                            ]
+                    preloaded_history = []
 
                     # Append current message WITH attachments to history
                     latest_msg = ChatMessage.from_text("user", user_text)
@@ -426,7 +572,14 @@ async def websocket_endpoint(
                     
                     # If the last message fetched from history/cache is the same text,
                     # replace it with the rich version containing attachments.
-                    if conversation_history and conversation_history[-1].role == "user" and conversation_history[-1].content[0].text == user_text:
+                    # Hash compare first; the full string compare only runs on match.
+                    last = conversation_history[-1] if conversation_history else None
+                    if (
+                        last is not None
+                        and last.role == "user"
+                        and last.text_hash() == latest_msg.text_hash()
+                        and last.content[0].text == user_text
+                    ):
                         conversation_history[-1] = latest_msg
                     else:
                         conversation_history.append(latest_msg)
@@ -440,22 +593,49 @@ async def websocket_endpoint(
 
                 async def stream_response():
                     nonlocal full_response, is_connected
-                    async for chunk in provider.generate_stream(
-                        conversation_history,
-                        selected_model,
-                        usage,
-                    ):
-                        if cancel_event.is_set():
-                            break
-                        full_response += chunk
-                        
+                    buf: List[str] = []
+                    buf_len = 0
+                    loop = asyncio.get_running_loop()
+                    last_flush = loop.time()
+
+                    async def flush() -> bool:
+                        nonlocal buf, buf_len, last_flush, is_connected
+                        if not buf:
+                            return True
+                        delta = "".join(buf)
+                        buf = []
+                        buf_len = 0
+                        last_flush = loop.time()
                         if not await safe_websocket_send(websocket, {
-                            "type": "content", 
-                            "delta": chunk
+                            "type": "content",
+                            "delta": delta
                         }):
                             is_connected = False
                             cancel_event.set()
-                            break
+                            return False
+                        return True
+
+                    try:
+                        async for chunk in provider.generate_stream(
+                            conversation_history,
+                            selected_model,
+                            usage,
+                        ):
+                            if cancel_event.is_set():
+                                break
+                            full_response += chunk
+                            buf.append(chunk)
+                            buf_len += len(chunk)
+
+                            # Batch tiny chunks: one frame per ~64 chars / 20ms
+                            # instead of one frame per token.
+                            if buf_len >= STREAM_FLUSH_CHARS or loop.time() - last_flush >= STREAM_FLUSH_SECONDS:
+                                if not await flush():
+                                    break
+                    finally:
+                        # Whatever is buffered still goes out, even if the
+                        # provider stream errors mid-response.
+                        await flush()
 
                 stream_task = asyncio.create_task(stream_response())
 
@@ -488,60 +668,20 @@ async def websocket_endpoint(
                         break
                     continue
 
-                # Billing & Atomic Deduction (in new isolated session)
-                async with async_session_maker() as db:
-                    try:
-                        total_cost_to_user = provider.calculate_cost(usage, selected_model)
-                        
-                        stmt = (
-                            update(Wallet)
-                            .where(Wallet.user_id == user_id)
-                            .values(credits=Wallet.credits - total_cost_to_user)
-                            .execution_options(synchronize_session="fetch")
-                        )
-                        await db.execute(stmt)
-                        await safe_db_commit(db)
-                        
-                        # Check wallet balance
-                        result = await db.execute(select(Wallet).where(Wallet.user_id == user_id))
-                        updated_wallet = result.scalar_one_or_none()
-                        
-                        if updated_wallet and updated_wallet.credits < 0:
-                            await safe_websocket_send(websocket, {
-                                "type": "system",
-                                "event": "warning",
-                                "payload": "Balance exhausted. Please top up."
-                            })
-
-                        # Save AI Message
-                        ai_msg = Message(
-                            chat_id=current_chat_id,
-                            role="ai",
-                            content=full_response,
-                            model=selected_model,
-                            cost=total_cost_to_user,
-                            tokens=usage.total_tokens,
-                        )
-                        db.add(ai_msg)
-                        await safe_db_commit(db)
-
-                    except Exception as e:
-                        logger.error(f"Error in billing/saving: {e}")
-                        # Don't fail completely - response was already sent
-
-                # Cache AI response
-                try:
-                    await cache.add_message(str(current_chat_id), "ai", full_response)
-                except Exception:
-                    pass
-                
-                # Send cost info
-                if is_connected:
-                    await safe_websocket_send(websocket, {
-                        "type": "system",
-                        "event": "cost",
-                        "payload": str(total_cost_to_user)
-                    })
+                # Billing & AI-message persistence run in a background task:
+                # none of it blocks the next receive_text, so the DB/Redis
+                # I/O overlaps with user think-time.
+                finalize_task = asyncio.create_task(_finalize_turn(
+                    websocket,
+                    wallet_id,
+                    current_chat_id,
+                    provider,
+                    usage,
+                    selected_model,
+                    full_response,
+                ))
+                pending_finalizers.add(finalize_task)
+                finalize_task.add_done_callback(pending_finalizers.discard)
 
                 # Check if we should exit the loop
                 if not is_connected:
@@ -564,7 +704,11 @@ async def websocket_endpoint(
         logger.error(f"Critical WebSocket Error: {type(e).__name__}: {e}")
         await safe_websocket_close(websocket, code=1011)
     finally:
-        if user:
+        # Let in-flight billing tasks finish before the connection is torn down
+        if pending_finalizers:
+            await asyncio.gather(*pending_finalizers, return_exceptions=True)
+
+        if user_email:
             logger.info(f"WebSocket cleanup completed for user: {user_email}")
         else:
             logger.info("WebSocket cleanup completed (user not authenticated)")
@@ -576,40 +720,54 @@ async def upload_files_for_context(
     current_user: dict = Depends(get_current_user),
     redis_client: redis.Redis = Depends(get_redis) 
 ):
-    processed_metadata = []
     cache = ChatCache(redis_client)
-    
-    for file in files:
-        try:
-            # Process the file (Extract text/base64)
-            result = await process_file(file)
-            
-            # Generate a reference ID
-            file_id = str(uuid.uuid4())
-            
-            # Store CONTENT in Redis
-            # We store the heavy extracted content here
-            file_content_payload = {
-                "type": result["type"],
-                "content": result["content"],
-                "mime_type": result.get("mime_type")
-            }
-            await cache.save_temp_file(file_id, file_content_payload)
-
-            # Return METADATA + ID to Frontend
-            processed_metadata.append({
-                "id": file_id,
-                "name": result.get("filename", file.filename),
-                "type": result["type"],
-                "size": file.size,
-                "mime_type": file.content_type
-            })
-            
-        except Exception as e:
-            logger.error(f"Upload error: {e}")
+
+    # Process all files concurrently instead of one-by-one; failures are
+    # reported per entry without aborting the rest.
+    results = await asyncio.gather(
+        *(process_file(file) for file in files),
+        return_exceptions=True,
+    )
+
+    processed_metadata = []
+    contents_to_store = {}
+
+    for file, result in zip(files, results):
+        if isinstance(result, Exception):
+            logger.error(f"Upload error: {result}")
             processed_metadata.append({
                 "filename": file.filename,
-                "error": str(e)
+                "error": getattr(result, "detail", str(result))
             })
-            
+            continue
+
+        # Generate a reference ID; the heavy extracted content goes to
+        # Redis, only metadata returns to the frontend
+        file_id = str(uuid.uuid4())
+        contents_to_store[file_id] = {
+            "type": result["type"],
+            "content": result["content"],
+            "mime_type": result.get("mime_type")
+        }
+        processed_metadata.append({
+            "id": file_id,
+            "name": result.get("filename", file.filename),
+            "type": result["type"],
+            "size": file.size,
+            "mime_type": file.content_type
+        })
+
+    # All contents in one pipelined round-trip. A failed save degrades
+    # the affected entries to per-file errors (the endpoint's contract
+    # is 200 with successes and failures side by side, never a 500).
+    try:
+        await cache.save_temp_files(contents_to_store)
+    except Exception as e:
+        logger.error(f"Temp file save failed: {e}")
+        processed_metadata = [
+            entry if "error" in entry
+            else {"filename": entry["name"], "error": "Failed to store file content"}
+            for entry in processed_metadata
+        ]
+
     return {"files": processed_metadata}
\ No newline at end of file
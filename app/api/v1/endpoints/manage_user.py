@@ -1,15 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, or_
 from typing import Optional
 from uuid import UUID
-from sqlalchemy.orm import joinedload
+import asyncio
+from sqlalchemy.orm import joinedload, selectinload
+from app.core.database import async_session_maker
 from app.core.database import get_db
 from app.models import User, Wallet
 from app.schemas.manage_user import UserAdminResponse, UserListResponse, UserUpdateAdmin
 
 router = APIRouter()
 
+# Validates and serializes the whole page in two Rust calls instead of
+# per-row model construction through FastAPI's response_model machinery.
+_USER_LIST_ADAPTER = TypeAdapter(UserListResponse)
+
 @router.get("", response_model=UserListResponse)
 async def list_users_admin(
     page: int = Query(1, ge=1),
@@ -21,7 +28,9 @@ async def list_users_admin(
 ):
     offset = (page - 1) * size
     
-    query = select(User).options(joinedload(User.wallet)).order_by(User.created_at.desc())
+    # selectinload issues one IN-list wallet query instead of a LEFT JOIN
+    # that widens every user row and needs a Python-side unique() pass
+    query = select(User).options(selectinload(User.wallet)).order_by(User.created_at.desc())
     count_query = select(func.count(User.id))
 
     # Search Logic
@@ -43,16 +52,24 @@ async def list_users_admin(
         query = query.where(User.is_superuser == is_superuser)
         count_query = count_query.where(User.is_superuser == is_superuser)
 
-    total_count = await db.scalar(count_query)
-    result = await db.execute(query.offset(offset).limit(size))
-    users = result.unique().scalars().all()
+    # Count and page fetch are independent; overlap them on a second session
+    async def _count():
+        async with async_session_maker() as count_db:
+            return await count_db.scalar(count_query)
+
+    total_count, result = await asyncio.gather(
+        _count(),
+        db.execute(query.offset(offset).limit(size)),
+    )
+    users = result.scalars().all()
 
-    return {
-        "users": users,
-        "total_count": total_count,
-        "page": page,
-        "size": size
-    }
+    payload = _USER_LIST_ADAPTER.dump_json(
+        _USER_LIST_ADAPTER.validate_python(
+            {"users": users, "total_count": total_count, "page": page, "size": size},
+            from_attributes=True,
+        )
+    )
+    return Response(content=payload, media_type="application/json")
 
 
 @router.patch("/{user_id}", response_model=UserAdminResponse)
@@ -1,12 +1,16 @@
+import asyncio
 import uuid
 import logging
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Path
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Path, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, delete, update
+from sqlalchemy.orm import joinedload
+from pydantic import TypeAdapter
 
 from app.core.database import get_db
+from app.core.etag import make_etag, is_not_modified
 from app.core.security import get_current_user
 from app.models.user import User, Wallet
 from app.models.chat import Message
@@ -19,14 +23,64 @@ from app.services.media.image_openai import image_service
 from app.services.storage import storage
 
 
-router = APIRouter()
+# orjson handles UUID/datetime/Decimal natively and serializes the media
+# lists several times faster than the stdlib encoder
+router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+# Upload whitelist: O(1) membership check, built once at import
+_ALLOWED_IMAGE_MIME = frozenset({"image/jpeg", "image/png", "image/webp"})
+
+# Whole-page validation/serialization in two Rust calls apiece, instead
+# of per-row model construction through response_model
+_AUDIO_LIST_ADAPTER = TypeAdapter(List[GeneratedAudioResponse])
+_IMAGE_LIST_ADAPTER = TypeAdapter(List[GeneratedImageResponse])
+_VIDEO_LIST_ADAPTER = TypeAdapter(List[GeneratedVideoResponse])
+
+
+def _etag_json_response(payload: bytes, etag: str) -> Response:
+    return Response(
+        content=payload,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "private, no-cache"},
+    )
+
+
+async def _refund_credits(db: AsyncSession, user_id, amount):
+    """
+    Compensating credit for a debit whose Celery enqueue failed, so a
+    broker hiccup never leaves the user charged with no task queued.
+    """
+    try:
+        await db.execute(
+            update(Wallet)
+            .where(Wallet.user_id == user_id)
+            .values(credits=Wallet.credits + amount)
+        )
+        await db.commit()
+    except Exception as e:
+        logger.error(f"Failed to refund {amount} credits to user {user_id}: {e}")
+
+
+def _sniff_image_mime(head: bytes) -> str | None:
+    """
+    Identify the image type from its magic bytes, so uploads are judged
+    by their actual content rather than the client-supplied header.
+    """
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
 
 # AUDIO / TTS ENDPOINTS
 
 @router.get("/list", response_model=List[GeneratedAudioResponse])
 async def list_generated_audio(
+    request: Request,
     limit: int = 20,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -37,38 +91,50 @@ async def list_generated_audio(
         .order_by(GeneratedAudio.created_at.desc())
         .limit(limit)
     )
-    return result.scalars().all()
+    audios = result.scalars().all()
+
+    # Polled from the dashboard: a matching ETag skips serialization
+    # and transfer entirely.
+    etag = make_etag("audio", current_user.id, limit, len(audios),
+                     audios[0].created_at if audios else None)
+    if is_not_modified(request, etag):
+        return Response(status_code=304)
+    return _etag_json_response(
+        _AUDIO_LIST_ADAPTER.dump_json(
+            _AUDIO_LIST_ADAPTER.validate_python(audios, from_attributes=True)
+        ),
+        etag,
+    )
 
 
 @router.delete("/audio/{audio_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_audio(
-    audio_id: str = Path(..., title="The ID of the audio to delete"),
+    background_tasks: BackgroundTasks,
+    audio_id: uuid.UUID = Path(..., title="The ID of the audio to delete"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete generated audio from DB and Storage.
     """
-    try:
-        audio_uuid = uuid.UUID(audio_id)
-    except ValueError:
-        raise HTTPException(400, "Invalid UUID")
-
-    result = await db.execute(
-        select(GeneratedAudio).where(GeneratedAudio.id == audio_uuid, GeneratedAudio.user_id == current_user.id)
-    )
-    audio = result.scalar_one_or_none()
-
-    if not audio:
+    # One round trip: the ownership-scoped DELETE doubles as the 404
+    # check and RETURNING hands back the URL for storage cleanup.
+    public_url = (await db.execute(
+        delete(GeneratedAudio)
+        .where(GeneratedAudio.id == audio_id, GeneratedAudio.user_id == current_user.id)
+        .returning(GeneratedAudio.public_url)
+    )).scalar_one_or_none()
+
+    if public_url is None:
+        await db.rollback()
         raise HTTPException(404, "Audio not found")
 
-    # Delete from Storage (R2)
-    if audio.public_url:
-        storage.delete_file(audio.public_url)
-
-    # Delete from DB
-    await db.delete(audio)
     await db.commit()
+
+    # R2 cleanup runs after the response — its latency stays off the
+    # request path.
+    if public_url:
+        background_tasks.add_task(storage.delete_file, public_url)
     return None
 
 
@@ -85,44 +151,52 @@ async def generate_audio_direct(
         raise HTTPException(status_code=400, detail="Text is required")
 
     estimated_cost = tts_service.calculate_cost(text)
-    
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == current_user.id))
-    wallet = wallet_result.scalar_one_or_none()
-    
-    if not wallet or wallet.credits < estimated_cost:
-         raise HTTPException(status_code=402, detail="Insufficient credits")
-    
-    wallet.credits -= estimated_cost
-    db.add(wallet)
+
+    # Atomic check-and-debit: the WHERE guard stops concurrent requests
+    # from racing the same balance, and RETURNING saves a re-read
+    new_balance = (await db.execute(
+        update(Wallet)
+        .where(Wallet.user_id == current_user.id, Wallet.credits >= estimated_cost)
+        .values(credits=Wallet.credits - estimated_cost)
+        .returning(Wallet.credits)
+    )).scalar_one_or_none()
+
+    if new_balance is None:
+        await db.rollback()
+        raise HTTPException(status_code=402, detail="Insufficient credits")
+
     await db.commit()
 
-    task = generate_tts_task.delay(
-        text=text,
-        chat_id=str(uuid.uuid4()),
-        message_id=None,
-        user_id=str(current_user.id),
-        cost=float(estimated_cost),
-        voice_name=voice_name
-    )
-    
+    try:
+        task = generate_tts_task.delay(
+            text=text,
+            chat_id=str(uuid.uuid4()),
+            message_id=None,
+            user_id=str(current_user.id),
+            cost=float(estimated_cost),
+            voice_name=voice_name
+        )
+    except Exception as e:
+        logger.error(f"TTS enqueue failed: {e}")
+        await _refund_credits(db, current_user.id, estimated_cost)
+        raise HTTPException(status_code=503, detail="Could not queue generation; credits refunded.")
+
     return {"status": "processing", "task_id": task.id}
 
 
 @router.post("/tts/{message_id}", status_code=status.HTTP_202_ACCEPTED)
 async def trigger_tts_generation(
-    message_id: str,
+    message_id: uuid.UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ) -> Any:
-    try:
-        msg_uuid = uuid.UUID(message_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid UUID format")
-
+    # Message + its chat + any existing audio come back in one round
+    # trip: chat is many-to-one and generated_audio is uselist=False, so
+    # joinedload LEFT JOINs both onto the single-row SELECT.
     result = await db.execute(
         select(Message)
-        .options(selectinload(Message.chat))
-        .where(Message.id == msg_uuid)
+        .options(joinedload(Message.chat), joinedload(Message.generated_audio))
+        .where(Message.id == message_id)
     )
     message = result.scalar_one_or_none()
 
@@ -131,19 +205,16 @@ async def trigger_tts_generation(
 
     if message.chat.user_id != current_user.id:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN, 
+            status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to access this message"
         )
 
-    audio_result = await db.execute(
-        select(GeneratedAudio).where(GeneratedAudio.source_message_id == msg_uuid)
-    )
-    existing_audio = audio_result.scalar_one_or_none()
+    existing_audio = message.generated_audio
 
     if existing_audio:
         return {
             "status": "exists",
-            "message_id": str(msg_uuid),
+            "message_id": str(message_id),
             "audio_url": existing_audio.public_url,
             "info": "Audio already generated."
         }
@@ -156,30 +227,44 @@ async def trigger_tts_generation(
 
     estimated_cost = tts_service.calculate_cost(clean_text)
 
-    wallet_result = await db.execute(select(Wallet).where(Wallet.user_id == current_user.id))
-    wallet = wallet_result.scalar_one_or_none()
+    wallet = current_user.wallet
 
     if not wallet:
         raise HTTPException(status_code=400, detail="User has no wallet configured")
 
-    if wallet.credits < estimated_cost:
+    # Snapshot before the UPDATE: the rollback below expires the ORM
+    # wallet, and touching it afterwards would trip implicit IO.
+    balance_before = wallet.credits
+
+    new_balance = (await db.execute(
+        update(Wallet)
+        .where(Wallet.user_id == current_user.id, Wallet.credits >= estimated_cost)
+        .values(credits=Wallet.credits - estimated_cost)
+        .returning(Wallet.credits)
+    )).scalar_one_or_none()
+
+    if new_balance is None:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
-            detail=f"Insufficient credits. Cost: {estimated_cost}, Balance: {wallet.credits}"
+            detail=f"Insufficient credits. Cost: {estimated_cost}, Balance: {balance_before}"
         )
 
-    wallet.credits -= estimated_cost
-    db.add(wallet)
     await db.commit()
 
-    task = generate_tts_task.delay(
-        text=clean_text,
-        chat_id=str(message.chat.id),
-        message_id=str(message.id),
-        user_id=str(current_user.id),
-        cost=float(estimated_cost),
-        voice_name="en-US-Neural2-F"
-    )
+    try:
+        task = generate_tts_task.delay(
+            text=clean_text,
+            chat_id=str(message.chat.id),
+            message_id=str(message.id),
+            user_id=str(current_user.id),
+            cost=float(estimated_cost),
+            voice_name="en-US-Neural2-F"
+        )
+    except Exception as e:
+        logger.error(f"TTS enqueue failed: {e}")
+        await _refund_credits(db, current_user.id, estimated_cost)
+        raise HTTPException(status_code=503, detail="Could not queue generation; credits refunded.")
 
     return {
         "status": "processing",
@@ -193,6 +278,7 @@ async def trigger_tts_generation(
 
 @router.get("/images/list", response_model=List[GeneratedImageResponse])
 async def list_generated_images(
+    request: Request,
     limit: int = 20,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -203,38 +289,44 @@ async def list_generated_images(
         .order_by(GeneratedImage.created_at.desc())
         .limit(limit)
     )
-    return result.scalars().all()
+    images = result.scalars().all()
+
+    etag = make_etag("image", current_user.id, limit, len(images),
+                     images[0].created_at if images else None)
+    if is_not_modified(request, etag):
+        return Response(status_code=304)
+    return _etag_json_response(
+        _IMAGE_LIST_ADAPTER.dump_json(
+            _IMAGE_LIST_ADAPTER.validate_python(images, from_attributes=True)
+        ),
+        etag,
+    )
 
 
 @router.delete("/images/{image_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_image(
-    image_id: str = Path(..., title="The ID of the image to delete"),
+    background_tasks: BackgroundTasks,
+    image_id: uuid.UUID = Path(..., title="The ID of the image to delete"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
     Delete generated image from DB and Storage.
     """
-    try:
-        img_uuid = uuid.UUID(image_id)
-    except ValueError:
-        raise HTTPException(400, "Invalid UUID")
-
-    result = await db.execute(
-        select(GeneratedImage).where(GeneratedImage.id == img_uuid, GeneratedImage.user_id == current_user.id)
-    )
-    image = result.scalar_one_or_none()
-
-    if not image:
+    public_url = (await db.execute(
+        delete(GeneratedImage)
+        .where(GeneratedImage.id == image_id, GeneratedImage.user_id == current_user.id)
+        .returning(GeneratedImage.public_url)
+    )).scalar_one_or_none()
+
+    if public_url is None:
+        await db.rollback()
         raise HTTPException(404, "Image not found")
 
-    # Delete from Storage (R2)
-    if image.public_url:
-        storage.delete_file(image.public_url)
-
-    # Delete from DB
-    await db.delete(image)
     await db.commit()
+
+    if public_url:
+        background_tasks.add_task(storage.delete_file, public_url)
     return None
 
 
@@ -256,9 +348,7 @@ async def generate_image(
         size=request.size
     )
 
-    stmt = select(Wallet).where(Wallet.user_id == current_user.id)
-    result = await db.execute(stmt)
-    wallet = result.scalars().first()
+    wallet = current_user.wallet
 
     if not wallet or wallet.credits < estimated_cost:
         raise HTTPException(
@@ -287,6 +377,7 @@ async def generate_image(
 
 @router.get("/videos/list", response_model=List[GeneratedVideoResponse])
 async def list_generated_videos(
+    request: Request,
     limit: int = 10,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
@@ -297,12 +388,25 @@ async def list_generated_videos(
         .order_by(GeneratedVideo.created_at.desc())
         .limit(limit)
     )
-    return result.scalars().all()
+    videos = result.scalars().all()
+
+    # Videos mutate in place while processing, so fold updated_at in too
+    etag = make_etag("video", current_user.id, limit, len(videos),
+                     max((v.updated_at for v in videos), default=None))
+    if is_not_modified(request, etag):
+        return Response(status_code=304)
+    return _etag_json_response(
+        _VIDEO_LIST_ADAPTER.dump_json(
+            _VIDEO_LIST_ADAPTER.validate_python(videos, from_attributes=True)
+        ),
+        etag,
+    )
 
 
 @router.delete("/videos/{video_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_video(
-    video_id: str = Path(..., title="The ID of the video to delete"),
+    background_tasks: BackgroundTasks,
+    video_id: uuid.UUID = Path(..., title="The ID of the video to delete"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -310,32 +414,26 @@ async def delete_video(
     Delete generated video from DB and Storage.
     Also deletes the specific source audio file generated for this video from Storage.
     """
-    try:
-        vid_uuid = uuid.UUID(video_id)
-    except ValueError:
-        raise HTTPException(400, "Invalid UUID")
-
-    # Fetch the Video
-    result = await db.execute(
-        select(GeneratedVideo).where(GeneratedVideo.id == vid_uuid, GeneratedVideo.user_id == current_user.id)
-    )
-    video = result.scalar_one_or_none()
-
-    if not video:
+    row = (await db.execute(
+        delete(GeneratedVideo)
+        .where(GeneratedVideo.id == video_id, GeneratedVideo.user_id == current_user.id)
+        .returning(GeneratedVideo.public_url, GeneratedVideo.source_audio_url)
+    )).first()
+
+    if row is None:
+        await db.rollback()
         raise HTTPException(404, "Video not found")
 
-    # Delete the Video file from R2
-    if video.public_url and video.public_url != "pending":
-        storage.delete_file(video.public_url)
-    
-    # Delete the specific Audio file used for this video from R2
-    if video.source_audio_url and video.source_audio_url != "pending":
-        storage.delete_file(video.source_audio_url)
+    public_url, source_audio_url = row
 
-    # Delete Video Record from DB
-    await db.delete(video)
     await db.commit()
-    
+
+    # Video file + its specific source audio go out in one DeleteObjects
+    # call, after the response
+    urls = [u for u in (public_url, source_audio_url) if u and u != "pending"]
+    if urls:
+        background_tasks.add_task(storage.delete_files, urls)
+
     return None
 
 
@@ -344,20 +442,29 @@ async def upload_media_asset(
     file: UploadFile = File(...),
     current_user: User = Depends(get_current_user)
 ):
-    if file.content_type not in ["image/jpeg", "image/png", "image/webp"]:
+    if file.content_type not in _ALLOWED_IMAGE_MIME:
         raise HTTPException(400, detail="Invalid file type. Only JPEG, PNG, or WebP allowed.")
-    
-    file_bytes = await file.read()
-    
+
+    # Cheap reject before any R2 traffic: the magic bytes must agree
+    head = await file.read(16)
+    await file.seek(0)
+    sniffed_mime = _sniff_image_mime(head)
+    if sniffed_mime not in _ALLOWED_IMAGE_MIME:
+        raise HTTPException(400, detail="File content does not match an allowed image type.")
+
     file_ext = file.filename.split('.')[-1] if '.' in file.filename else "png"
     filename = f"uploads/{current_user.id}/{uuid.uuid4()}.{file_ext}"
-    
-    public_url = storage.upload_file(
-        file_bytes=file_bytes,
-        destination_path=filename,
-        content_type=file.content_type
+
+    # Stream the spooled upload straight to R2 in a worker thread instead
+    # of buffering the whole file into memory first; boto3 handles
+    # multipart and keeps memory bounded by the part size.
+    public_url = await asyncio.to_thread(
+        storage.upload_fileobj,
+        file.file,
+        filename,
+        sniffed_mime,
     )
-    
+
     return {"public_url": public_url}
 
 
@@ -369,9 +476,16 @@ async def generate_avatar(
 ):
     estimated_cost = did_service.calculate_cost(duration_seconds=15)
 
-    wallet = (await db.execute(select(Wallet).where(Wallet.user_id == current_user.id))).scalar_one_or_none()
+    # Debit atomically; the video row rides in the same transaction
+    new_balance = (await db.execute(
+        update(Wallet)
+        .where(Wallet.user_id == current_user.id, Wallet.credits >= estimated_cost)
+        .values(credits=Wallet.credits - estimated_cost)
+        .returning(Wallet.credits)
+    )).scalar_one_or_none()
 
-    if not wallet or wallet.credits < estimated_cost:
+    if new_balance is None:
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_402_PAYMENT_REQUIRED,
             detail=f"Insufficient credits. Required: {estimated_cost}"
@@ -390,20 +504,25 @@ async def generate_avatar(
         status="processing"
     )
     db.add(new_video)
-    
-    wallet.credits -= estimated_cost
-    db.add(wallet)
-    
+
     await db.commit()
     await db.refresh(new_video)
 
-    task = generate_avatar_task.delay(
-        script_text=request.text,
-        voice_name=request.voice_name,
-        avatar_url=request.avatar_url,
-        user_id=str(current_user.id),
-        video_db_id=str(new_video.id)
-    )
+    try:
+        task = generate_avatar_task.delay(
+            script_text=request.text,
+            voice_name=request.voice_name,
+            avatar_url=request.avatar_url,
+            user_id=str(current_user.id),
+            video_db_id=str(new_video.id)
+        )
+    except Exception as e:
+        logger.error(f"Avatar enqueue failed: {e}")
+        new_video.status = "failed"
+        new_video.error_message = "Task queueing failed"
+        db.add(new_video)
+        await _refund_credits(db, current_user.id, estimated_cost)
+        raise HTTPException(status_code=503, detail="Could not queue generation; credits refunded.")
 
     return {
         "task_id": task.id,
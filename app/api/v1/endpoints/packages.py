@@ -1,28 +1,76 @@
+import logging
 from typing import List, Any
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+import redis.asyncio as redis
 from app.core.security import get_current_user, get_current_admin
 from app.core.database import get_db
+from app.core.etag import make_etag, is_not_modified
+from app.core.redis import get_redis
 from app.models.package import Package
 from app.schemas.package import PackageCreate, PackageUpdate, PackageResponse
 from app.models.user import User
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Package data mutates rarely but is read on every pricing page view, so
+# list responses are served from Redis for a short window and the admin
+# write paths drop the cached pages.
+PACKAGES_CACHE_PREFIX = "packages:list"
+PACKAGES_CACHE_TTL = 30  # seconds
+
+_PACKAGE_LIST_ADAPTER = TypeAdapter(List[PackageResponse])
+
+
+def _package_list_response(request: Request, payload) -> Response:
+    """Serve a (possibly cached) serialized page, honoring If-None-Match."""
+    body = payload if isinstance(payload, bytes) else payload.encode()
+    etag = make_etag(body)
+    if is_not_modified(request, etag):
+        return Response(status_code=304)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": f"private, max-age={PACKAGES_CACHE_TTL}"},
+    )
+
+
+async def _invalidate_packages_cache(redis_client: redis.Redis):
+    try:
+        keys = [
+            key async for key in redis_client.scan_iter(match=f"{PACKAGES_CACHE_PREFIX}:*")
+        ]
+        if keys:
+            await redis_client.delete(*keys)
+    except Exception as e:
+        logger.warning(f"Package cache invalidation failed: {e}")
 
 # Public/User Routes
 
-@router.get("/", response_model=List[PackageResponse])
+@router.get("/")
 async def read_packages(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
     current_user: User = Depends(get_current_user)
 ) -> Any:
     """
     Retrieve active packages for purchase.
     """
+    cache_key = f"{PACKAGES_CACHE_PREFIX}:{skip}:{limit}"
+    try:
+        cached = await redis_client.get(cache_key)
+        if cached:
+            return _package_list_response(request, cached)
+    except Exception as e:
+        logger.warning(f"Package cache read failed: {e}")
+
     stmt = (
         select(Package)
         .order_by(Package.is_active.desc(), Package.price.asc())
@@ -31,7 +79,16 @@ async def read_packages(
     )
     result = await db.execute(stmt)
     packages = result.scalars().all()
-    return packages
+
+    payload = _PACKAGE_LIST_ADAPTER.dump_json(
+        _PACKAGE_LIST_ADAPTER.validate_python(packages, from_attributes=True)
+    )
+    try:
+        await redis_client.setex(cache_key, PACKAGES_CACHE_TTL, payload)
+    except Exception as e:
+        logger.warning(f"Package cache write failed: {e}")
+
+    return _package_list_response(request, payload)
 
 
 # Admin Only Routes
@@ -40,6 +97,7 @@ async def read_packages(
 async def create_package(
     *,
     db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
     package_in: PackageCreate,
     current_user: User = Depends(get_current_admin),
 ) -> Any:
@@ -68,12 +126,14 @@ async def create_package(
     db.add(package)
     await db.commit()
     await db.refresh(package)
+    await _invalidate_packages_cache(redis_client)
     return package
 
 @router.put("/{package_id}", response_model=PackageResponse)
 async def update_package(
     *,
     db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
     package_id: UUID,
     package_in: PackageUpdate,
     current_user: User = Depends(get_current_admin),
@@ -93,12 +153,14 @@ async def update_package(
     db.add(package)
     await db.commit()
     await db.refresh(package)
+    await _invalidate_packages_cache(redis_client)
     return package
 
 @router.delete("/{package_id}", response_model=PackageResponse)
 async def delete_package(
     *,
     db: AsyncSession = Depends(get_db),
+    redis_client: redis.Redis = Depends(get_redis),
     package_id: UUID,
     current_user: User = Depends(get_current_admin),
 ) -> Any:
@@ -113,4 +175,5 @@ async def delete_package(
     db.add(package)
     await db.commit()
     await db.refresh(package)
+    await _invalidate_packages_cache(redis_client)
     return package
\ No newline at end of file
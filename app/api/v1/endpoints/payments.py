@@ -1,14 +1,24 @@
 import stripe
 import razorpay
 import asyncio
-from fastapi import APIRouter, Depends, HTTPException, Request, Header, status
+import logging
+import hmac
+import time
+import orjson
+import requests
+from hashlib import sha256
+from requests.adapters import HTTPAdapter
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Header, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from datetime import datetime, timezone
 from decimal import Decimal
 
 from app.core.database import get_db
 from app.core.config import settings
+from app.core.etag import make_etag, is_not_modified
 from app.core.security import get_current_user
 from app.models.user import User, Wallet
 from app.models.package import Package
@@ -19,12 +29,63 @@ from typing import List
 # Initialize Stripe
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+# One keep-alive session shared by every Stripe call (they run in
+# threads via asyncio.to_thread) so checkouts reuse the TLS connection
+# to api.stripe.com instead of handshaking per request.
+_stripe_session = requests.Session()
+_stripe_session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+stripe.default_http_client = stripe.http_client.RequestsClient(session=_stripe_session)
+
 # Initialize Razorpay Client
 razorpay_client = razorpay.Client(
     auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET)
 )
 
-router = APIRouter()
+logger = logging.getLogger(__name__)
+
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Same replay tolerance as the Stripe SDK default
+_WEBHOOK_TOLERANCE = 300  # seconds
+
+
+def _verify_stripe_event(payload: bytes, header: str | None, secret: str) -> dict | None:
+    """
+    Verify a Stripe webhook signature and parse the event, without the
+    SDK's per-call object wrapping: one OpenSSL-backed HMAC-SHA256 over
+    the signed payload plus one orjson parse. Returns the event dict, or
+    None when the signature is missing, stale or wrong.
+    """
+    if not header:
+        return None
+
+    timestamp = None
+    signatures = []
+    for item in header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+
+    if timestamp is None or not signatures:
+        return None
+    try:
+        if abs(time.time() - int(timestamp)) > _WEBHOOK_TOLERANCE:
+            return None
+    except ValueError:
+        return None
+
+    signed_payload = timestamp.encode() + b"." + payload
+    expected = hmac.new(secret.encode(), signed_payload, sha256).hexdigest()
+    if not any(hmac.compare_digest(expected, sig) for sig in signatures):
+        return None
+
+    try:
+        return orjson.loads(payload)
+    except orjson.JSONDecodeError:
+        return None
+
 
 # CHECKOUT ENDPOINT
 @router.post("/create-checkout-session/{package_id}")
@@ -101,15 +162,10 @@ async def stripe_webhook(
     db: AsyncSession = Depends(get_db)
 ):
     payload = await request.body()
-    
-    try:
-        event = stripe.Webhook.construct_event(
-            payload, stripe_signature, settings.STRIPE_WEBHOOK_SECRET
-        )
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Invalid payload")
-    except stripe.error.SignatureVerificationError:
-        raise HTTPException(status_code=400, detail="Invalid signature")
+
+    event = _verify_stripe_event(payload, stripe_signature, settings.STRIPE_WEBHOOK_SECRET)
+    if event is None:
+        raise HTTPException(status_code=400, detail="Invalid payload or signature")
 
     if event["type"] == "checkout.session.completed":
         session = event["data"]["object"]
@@ -129,34 +185,41 @@ async def handle_checkout_completed(session, db: AsyncSession):
         return
 
     try:
-        # Get Transaction
-        result = await db.execute(
-            select(Transaction).where(Transaction.stripe_session_id == stripe_session_id)
-        )
-        transaction_record = result.scalar_one_or_none()
-
-        if not transaction_record or transaction_record.status == "completed":
+        # Claim the pending transaction. SKIP LOCKED makes duplicate
+        # Stripe deliveries no-op immediately instead of queueing on the
+        # row lock; already-completed rows don't match the filter at all.
+        transaction_record = (await db.execute(
+            select(Transaction)
+            .where(
+                Transaction.stripe_session_id == stripe_session_id,
+                Transaction.status == "pending",
+            )
+            .with_for_update(skip_locked=True)
+        )).scalar_one_or_none()
+
+        if not transaction_record:
             return
 
-        # Lock Wallet
-        result = await db.execute(
-            select(Wallet).where(Wallet.user_id == user_id).with_for_update()
+        # Single atomic upsert: credits an existing wallet or creates one
+        # for a brand-new user, with no window for duplicate INSERTs
+        # under concurrent webhook deliveries.
+        credits = Decimal(credits_str)
+        await db.execute(
+            pg_insert(Wallet)
+            .values(user_id=user_id, credits=credits)
+            .on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={"credits": Wallet.credits + credits},
+            )
         )
-        wallet = result.scalar_one_or_none()
-
-        if not wallet:
-            wallet = Wallet(user_id=user_id, credits=0)
-            db.add(wallet)
 
-        # Update (Atomic)
-        wallet.credits += Decimal(credits_str)
         transaction_record.status = "completed"
         transaction_record.completed_at = datetime.now(timezone.utc)
-
-        db.add(wallet)
         db.add(transaction_record)
+
+        # One transaction boundary for claim + credit + completion
         await db.commit()
-        
+
     except Exception as e:
         await db.rollback()
         print(f"CRITICAL ERROR in Webhook: {str(e)}")
@@ -250,29 +313,29 @@ async def verify_razorpay_payment(
         raise HTTPException(status_code=404, detail="Valid pending transaction not found")
 
     try:
-        # Lock Wallet for atomic update
-        result = await db.execute(
-            select(Wallet).where(Wallet.user_id == transaction_record.user_id).with_for_update()
+        # Same atomic upsert as the Stripe webhook path
+        await db.execute(
+            pg_insert(Wallet)
+            .values(
+                user_id=transaction_record.user_id,
+                credits=transaction_record.credits_added,
+            )
+            .on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={"credits": Wallet.credits + transaction_record.credits_added},
+            )
         )
-        wallet = result.scalar_one_or_none()
-
-        if not wallet:
-            wallet = Wallet(user_id=transaction_record.user_id, credits=0)
-            db.add(wallet)
 
-        # Update Wallet and Transaction
-        wallet.credits += transaction_record.credits_added
-        
         transaction_record.status = "completed"
         transaction_record.razorpay_payment_id = verification_data.razorpay_payment_id
         transaction_record.completed_at = datetime.now(timezone.utc)
 
-        db.add(wallet)
         db.add(transaction_record)
         await db.commit()
-        
+
     except Exception as e:
         await db.rollback()
+        logger.error(f"Razorpay wallet top-up failed for order {verification_data.razorpay_order_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to process wallet top-up")
 
     return {"status": "success", "message": "Payment verified and credits added"}
@@ -281,6 +344,8 @@ async def verify_razorpay_payment(
 # PAYMENT HISTORY ENDPOINT
 @router.get("/history", response_model=List[TransactionResponse])
 async def read_payment_history(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
@@ -289,4 +354,15 @@ async def read_payment_history(
         .where(Transaction.user_id == current_user.id)
         .order_by(Transaction.created_at.desc())
     )
-    return result.scalars().all()
\ No newline at end of file
+    transactions = result.scalars().all()
+
+    # Dashboard polls this list; a matching ETag skips the body. Statuses
+    # flip pending->completed without a new row, so fold them in too.
+    etag = make_etag("txn", current_user.id, len(transactions),
+                     transactions[0].created_at if transactions else None,
+                     *(t.status for t in transactions))
+    if is_not_modified(request, etag):
+        return Response(status_code=304)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+    return transactions
\ No newline at end of file
@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import update
 
 from app.core.database import get_db
+from app.core.etag import make_etag, is_not_modified
 from app.core.security import get_current_user
 from app.models.user import User, Wallet
 from app.schemas.user import UserResponse, UserUpdateProfile
@@ -11,14 +12,22 @@ router = APIRouter()
 
 @router.get("/me", response_model=UserResponse)
 async def read_user_me(
+    request: Request,
+    response: Response,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
 ):
     """
     Get current user profile + Wallet Credits
     """
-    # Explicitly load the wallet to ensure it is returned in the response
-    await db.refresh(current_user, attribute_names=["wallet"])
+    # Wallet is already eager-loaded by get_current_user — no refresh
+    wallet = current_user.wallet
+    etag = make_etag("me", current_user.id, current_user.updated_at,
+                     wallet.updated_at if wallet else None,
+                     wallet.credits if wallet else None)
+    if is_not_modified(request, etag):
+        return Response(status_code=304)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
     return current_user
 
 @router.post("/topup")
@@ -33,18 +42,21 @@ async def dev_top_up_credits(
     """
     if amount > 10000:
         raise HTTPException(status_code=400, detail="Max 10,000 credits allowed.")
-        
-    result = await db.execute(select(Wallet).where(Wallet.user_id == current_user.id))
-    wallet = result.scalar_one_or_none()
-    
-    if not wallet:
+
+    # Atomic increment in one round trip; RETURNING saves the refresh
+    new_credits = (await db.execute(
+        update(Wallet)
+        .where(Wallet.user_id == current_user.id)
+        .values(credits=Wallet.credits + amount)
+        .returning(Wallet.credits)
+    )).scalar_one_or_none()
+
+    if new_credits is None:
+        await db.rollback()
         raise HTTPException(status_code=404, detail="Wallet not found")
 
-    wallet.credits += amount
-    
     await db.commit()
-    await db.refresh(wallet)
-    return {"message": "Credits updated", "new_credits": wallet.credits}
+    return {"message": "Credits updated", "new_credits": new_credits}
 
 
 @router.patch("/me", response_model=UserResponse)
@@ -62,7 +74,7 @@ async def update_user_me(
 
     await db.commit()
 
-    # Refresh user to ensure updated_at is accurate
-    await db.refresh(current_user, attribute_names=["wallet"])
+    # Refresh only updated_at (set by onupdate); the wallet is already loaded
+    await db.refresh(current_user, attribute_names=["updated_at"])
 
     return current_user
\ No newline at end of file
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 
@@ -15,11 +16,17 @@ class Settings(BaseSettings):
     GOOGLE_API_KEY: str | None = None
     DID_API_KEY: str | None = None
 
-    DB_POOL_SIZE: int = 5
-    DB_MAX_OVERFLOW: int = 10
+    # Sized for uvicorn workers x expected concurrent DB ops; raise via
+    # env when worker count grows
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 40
     DB_POOL_TIMEOUT: int = 30
     DB_POOL_RECYCLE: int = 1800
     DB_CONNECT_TIMEOUT: int = 30
+    # Set when DATABASE_URL points at PgBouncer in transaction pooling mode
+    PGBOUNCER: bool = False
+    # Log every SQL statement (debugging only — it taxes each query)
+    SQL_ECHO: bool = False
 
     GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
 
@@ -40,4 +47,14 @@ class Settings(BaseSettings):
 
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
-settings = Settings()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Parse the environment exactly once. Usable as a FastAPI dependency
+    (Depends(get_settings)) and guarantees the module-level singleton
+    below is the same instance everywhere.
+    """
+    return Settings()
+
+
+settings = get_settings()
\ No newline at end of file
@@ -2,7 +2,6 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.pool import NullPool
 from sqlalchemy import text
-from contextlib import asynccontextmanager
 import logging
 import asyncio
 
@@ -10,19 +9,50 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    poolclass=NullPool,
-    connect_args={
-        "timeout": 30,
-        "command_timeout": 60,
-        "server_settings": {
-            "application_name": "fastapi_app"
+if settings.PGBOUNCER:
+    # PgBouncer (transaction mode) does the real pooling: keep checkout
+    # cheap with NullPool, skip the reset-on-return ROLLBACK (PgBouncer
+    # resets server state itself) and keep asyncpg's prepared-statement
+    # cache off — prepared statements break behind transaction pooling.
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        pool_reset_on_return=None,
+        connect_args={
+            "timeout": 30,
+            "command_timeout": 60,
+            "server_settings": {
+                "application_name": "fastapi_app"
+            },
+            "statement_cache_size": 0,
         },
-        "statement_cache_size": 0,
-    },
-    echo=False,
-)
+        # Roomy compiled-statement cache so the hoisted statement templates
+        # stay compiled across requests.
+        query_cache_size=1200,
+        echo=settings.SQL_ECHO,
+    )
+else:
+    # Direct-to-Postgres: pool connections in-process so short endpoints
+    # don't pay a fresh TCP+auth handshake per request. asyncpg's
+    # prepared-statement cache stays at its default here (safe without a
+    # transaction-mode pooler in front).
+    engine = create_async_engine(
+        settings.DATABASE_URL,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=True,
+        connect_args={
+            "timeout": 30,
+            "command_timeout": 60,
+            "server_settings": {
+                "application_name": "fastapi_app"
+            },
+        },
+        query_cache_size=1200,
+        echo=settings.SQL_ECHO,
+    )
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -89,14 +119,4 @@ async def warmup_db_connection():
         logger.warning(f"Database warmup attempt {attempt + 1} failed, retrying...")
         await asyncio.sleep(2)
     logger.warning("Could not establish initial database connection")
-    return False
-
-
-@asynccontextmanager
-async def lifespan(app):
-    """FastAPI lifespan context manager."""
-    logger.info("Starting up application...")
-    await warmup_db_connection()
-    yield
-    logger.info("Shutting down application...")
-    await engine.dispose()
\ No newline at end of file
+    return False
\ No newline at end of file
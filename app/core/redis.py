@@ -1,14 +1,30 @@
+import asyncio
+
 import redis.asyncio as redis
-import json
+import orjson
 from typing import List
 from app.core.config import settings
-from app.services.llm.schema import ChatMessage 
+from app.services.llm.schema import ChatMessage
+from app.services.storage import storage
 
 REDIS_URL = settings.REDIS_URL
 
+# Shared connection pool, sized for the WebSocket fanout. redis-py picks
+# up the hiredis C parser automatically when it's installed, so replies
+# are parsed outside pure Python.
+redis_pool = redis.ConnectionPool.from_url(
+    REDIS_URL,
+    max_connections=256,
+    encoding="utf-8",
+    decode_responses=True,
+    socket_keepalive=True,
+    health_check_interval=30,
+)
+
 async def get_redis():
     """Dependency to get Redis connection"""
-    client = redis.from_url(REDIS_URL, encoding="utf-8", decode_responses=True)
+    # Clients are cheap wrappers; the pooled connections are reused
+    client = redis.Redis(connection_pool=redis_pool)
     try:
         yield client
     finally:
@@ -16,41 +32,132 @@ async def get_redis():
 
 class ChatCache:
     """Helper to manage Chat History in Redis"""
+    # Above this content size, temp payloads go to R2 and Redis keeps only
+    # the reference — a 4 MB image would otherwise sit in Redis as ~5.4 MB
+    # of base64 and ride every GET. (The temp_files/ prefix should carry a
+    # bucket lifecycle rule so spilled blobs expire like their Redis keys.)
+    TEMP_FILE_REDIS_MAX = 256 * 1024
+
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
         self.ttl = 3600  # Cache expires in 1 hour
 
+    async def _spill_large_content(self, file_id: str, file_data: dict) -> dict:
+        """Move oversized content to R2, returning a slim dict with a ref."""
+        content = file_data.get("content")
+        if not isinstance(content, str) or len(content) <= self.TEMP_FILE_REDIS_MAX:
+            return file_data
+        url = await asyncio.to_thread(
+            storage.upload_file,
+            content.encode("utf-8"),
+            f"temp_files/{file_id}",
+            "application/octet-stream",
+        )
+        slim = dict(file_data)
+        slim["content"] = None
+        slim["ref"] = url
+        return slim
+
+    @staticmethod
+    async def _resolve_ref(file_data: dict | None) -> dict | None:
+        """Pull spilled content back from R2 when the payload holds a ref."""
+        if not file_data or not file_data.get("ref"):
+            return file_data
+        blob = await asyncio.to_thread(storage.get_file_bytes, file_data["ref"])
+        resolved = dict(file_data)
+        resolved["content"] = blob.decode("utf-8") if blob is not None else None
+        resolved.pop("ref", None)
+        return resolved
+
     async def add_message(self, chat_id: str, role: str, content: str):
         key = f"chat:{chat_id}:history"
-        # We serialize to JSON for storage
-        msg = json.dumps({"role": role, "content": content})
-        await self.redis.rpush(key, msg)
-        await self.redis.expire(key, self.ttl)
+        # We serialize to JSON for storage (orjson: C encoder/decoder)
+        msg = orjson.dumps({"role": role, "content": content})
+        # RPUSH + EXPIRE in one round-trip
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(key, msg)
+        pipe.expire(key, self.ttl)
+        await pipe.execute()
 
     async def get_history(self, chat_id: str, limit: int = 10) -> List[ChatMessage]:
         key = f"chat:{chat_id}:history"
-        raw_messages = await self.redis.lrange(key, -limit, -1)
-        
-        # Transformation Logic: JSON String -> Dict -> ChatMessage Object
-        history_objects = []
-        for m in raw_messages:
-            data = json.loads(m)
-            obj = ChatMessage.from_text(role=data["role"], content=data["content"])
-            history_objects.append(obj)
-            
-        return history_objects
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.llen(key)
+        pipe.lrange(key, -2 * limit, -1)
+        length, raw_messages = await pipe.execute()
+        return self._parse_history(self._anchored_window(raw_messages, length, limit))
+
+    async def add_message_and_get_history(
+        self, chat_id: str, role: str, content: str, limit: int = 10
+    ) -> List[ChatMessage]:
+        """
+        Append a message and fetch the recent history in ONE Redis
+        round-trip (RPUSH + EXPIRE + LRANGE pipelined). The returned
+        history includes the message just added.
+        """
+        key = f"chat:{chat_id}:history"
+        msg = orjson.dumps({"role": role, "content": content})
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.rpush(key, msg)  # RPUSH replies with the post-push length
+        pipe.expire(key, self.ttl)
+        pipe.lrange(key, -2 * limit, -1)
+        results = await pipe.execute()
+        return self._parse_history(self._anchored_window(results[2], results[0], limit))
+
+    @staticmethod
+    def _anchored_window(raw_messages: List[str], length: int, limit: int) -> List[str]:
+        """
+        Trim the fetched tail to a window whose start only advances in
+        steps of `limit`, instead of sliding by one every turn. The
+        window holds limit..2*limit-1 messages, and its prefix stays
+        byte-identical for `limit` consecutive turns — which is what
+        lets provider-side prompt caches (Anthropic's prefix cache,
+        OpenAI's prompt_cache_key routing) actually hit; a per-turn
+        sliding window invalidates them on every message.
+        """
+        if length <= limit:
+            return raw_messages
+        start = ((length - limit) // limit) * limit
+        fetch_start = max(0, length - 2 * limit)
+        return raw_messages[start - fetch_start:]
+
+    @staticmethod
+    def _parse_history(raw_messages: List[str]) -> List[ChatMessage]:
+        # Transformation Logic: JSON String -> Dict -> ChatMessage Object.
+        # Locally bound callables + listcomp keep the per-message overhead
+        # to the parse itself on deep histories.
+        loads = orjson.loads
+        from_text = ChatMessage.from_text
+        return [
+            from_text(role=data["role"], content=data["content"])
+            for data in map(loads, raw_messages)
+        ]
     
     async def save_temp_file(self, file_id: str, file_data: dict):
         """
         Stores file content (base64 or text) in Redis with an expiration.
         """
         key = f"temp_file:{file_id}"
+        file_data = await self._spill_large_content(file_id, file_data)
         await self.redis.setex(
             key,
             self.ttl,
-            json.dumps(file_data)
+            orjson.dumps(file_data)
         )
 
+    async def save_temp_files(self, files: dict):
+        """
+        Stores several files (id -> payload dict) in one pipelined
+        round-trip, each with the standard expiration.
+        """
+        if not files:
+            return
+        pipe = self.redis.pipeline(transaction=False)
+        for file_id, file_data in files.items():
+            file_data = await self._spill_large_content(file_id, file_data)
+            pipe.setex(f"temp_file:{file_id}", self.ttl, orjson.dumps(file_data))
+        await pipe.execute()
+
     async def get_temp_file(self, file_id: str) -> dict | None:
         """
         Retrieves file content by ID.
@@ -58,5 +165,21 @@ class ChatCache:
         key = f"temp_file:{file_id}"
         data = await self.redis.get(key)
         if data:
-            return json.loads(data)
-        return None
\ No newline at end of file
+            return await self._resolve_ref(orjson.loads(data))
+        return None
+
+    async def get_temp_files(self, file_ids: List[str]) -> List[dict | None]:
+        """
+        Retrieves several files in one pipelined round-trip.
+        Missing/expired entries come back as None, in input order.
+        """
+        if not file_ids:
+            return []
+        pipe = self.redis.pipeline(transaction=False)
+        for file_id in file_ids:
+            pipe.get(f"temp_file:{file_id}")
+        results = await pipe.execute()
+        return list(await asyncio.gather(*(
+            self._resolve_ref(orjson.loads(data) if data else None)
+            for data in results
+        )))
\ No newline at end of file
@@ -1,6 +1,9 @@
+import time
 from datetime import datetime, timedelta, timezone
+from hashlib import blake2b
 from jose import jwt, JWTError
 from pwdlib import PasswordHash
+from cachetools import TTLCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -13,6 +16,39 @@ from app.models.user import User
 password_hash = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# Verified-token cache: signature checks run on every HTTP request and every
+# WebSocket connect, but a token's claims never change once verified. We key
+# by a short token digest and remember the subject until the cache TTL or the
+# token's own expiry, whichever comes first. The DB user lookup still runs so
+# deactivated users are cut off immediately.
+_token_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+
+
+def decode_token_subject(token: str) -> str | None:
+    """
+    Verify the JWT and return its subject (email), or None if invalid.
+    Successful verifications are cached keyed by a digest of the token.
+    """
+    cache_key = blake2b(token.encode(), digest_size=16).hexdigest()
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        email, exp = cached
+        if exp > time.time():
+            return email
+        return None
+
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+
+    email = payload.get("sub")
+    if email is None:
+        return None
+
+    _token_cache[cache_key] = (email, payload.get("exp", 0))
+    return email
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return password_hash.verify(plain_password, hashed_password)
 
@@ -35,18 +71,15 @@ async def get_current_user(
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    email = decode_token_subject(token)
+    if email is None:
         raise credentials_exception
-    
-    # Check DB
+
+    # Check DB. User.wallet is lazy="joined", so the wallet rides along
+    # in this same SELECT for the billing endpoints.
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
-    
+
     if user is None:
         raise credentials_exception
     return user
@@ -60,22 +93,4 @@ async def get_current_admin(current_user: User = Depends(get_current_user)) -> U
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user does not have enough privileges"
         )
-    return current_user
-
-
-async def verify_token_socket(token: str, db: AsyncSession) -> User | None:
-    """
-    Special authentication helper for WebSockets.
-    Returns User object or None if invalid.
-    """
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-    except JWTError:
-        return None
-    
-    result = await db.execute(select(User).where(User.email == email))
-    user = result.scalar_one_or_none()
-    return user
\ No newline at end of file
+    return current_user
\ No newline at end of file
@@ -1,9 +1,33 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.api.v1.endpoints import auth, users, chat, media, packages, payments, admin_stats, manage_user
 from app.core.config import settings
+from app.core.database import engine, warmup_db_connection
+from app.core.redis import redis_pool
+from app.services.batching import message_batcher
 
-app = FastAPI(title=settings.PROJECT_NAME)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: warm the DB pool and start the write batcher
+    await warmup_db_connection()
+    message_batcher.start()
+    yield
+    # Shutdown: drain the batcher before tearing down shared resources
+    await message_batcher.stop()
+    await engine.dispose()
+    await redis_pool.aclose()
+
+
+# Every router inherits orjson serialization (Rust encoder with native
+# UUID/datetime/Decimal support) unless it overrides the response class.
+app = FastAPI(
+    title=settings.PROJECT_NAME,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+)
 
 origins = [
     "https://multiaimodel.com",
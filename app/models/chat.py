@@ -1,40 +1,53 @@
-import uuid
-from datetime import datetime, timezone
-from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Integer, Numeric, JSON, Index
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import Column, String, Text, ForeignKey, DateTime, Integer, Numeric, Index, func, text
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from app.core.database import Base
-
-def utc_now():
-    return datetime.now(timezone.utc)
+from app.core.uuid7 import uuid7
 
 class Chat(Base):
     __tablename__ = "chats"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     title = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), default=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     messages = relationship("Message", back_populates="chat", cascade="all, delete-orphan")
     user = relationship("User", back_populates="chats")
 
+    __table_args__ = (
+        # get_user_chats lists a user's chats newest-first; this index lets
+        # Postgres return them in index order without a sort.
+        Index('ix_chats_user_id_created_at', 'user_id', 'created_at'),
+    )
+
 class Message(Base):
     __tablename__ = "messages"
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     chat_id = Column(UUID(as_uuid=True), ForeignKey("chats.id"), nullable=False)
     
-    role = Column(String, nullable=False)
+    # Native enum: 4 bytes per row vs repeated short strings, and the
+    # value domain matches the Role literal in app.services.llm.schema
+    role = Column(
+        SAEnum("system", "user", "assistant", "ai", name="message_role"),
+        nullable=False,
+    )
     content = Column(Text, nullable=False)
-    attachments = Column(JSON, default=list)
+    # JSONB: binary on disk and over the wire, no server-side text parse,
+    # and GIN-indexable later if attachments ever need querying
+    attachments = Column(JSONB, default=list, server_default=text("'[]'::jsonb"))
     model = Column(String, nullable=True)
     
     tokens = Column(Integer, default=0)
     cost = Column(Numeric(18, 6), default=0.000000)
-    created_at = Column(DateTime(timezone=True), default=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     chat = relationship("Chat", back_populates="messages")
+    generated_audio = relationship(
+        "GeneratedAudio", back_populates="source_message", uselist=False
+    )
 
     __table_args__ = (
         Index('ix_messages_chat_id_created_at', 'chat_id', 'created_at'),
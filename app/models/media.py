@@ -1,17 +1,14 @@
-import uuid
-from datetime import datetime, timezone
-from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Numeric
+from sqlalchemy import Column, String, ForeignKey, Text, DateTime, Numeric, Index, func
+from sqlalchemy import Enum as SAEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
-
-def utc_now():
-    return datetime.now(timezone.utc)
+from app.core.uuid7 import uuid7
 
 class GeneratedAudio(Base):
     __tablename__ = "generated_audio"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     # Core Metadata
@@ -22,16 +19,24 @@ class GeneratedAudio(Base):
     voice_name = Column(String, nullable=True)
     provider = Column(String, default="google")
     source_message_id = Column(UUID(as_uuid=True), ForeignKey("messages.id"), nullable=True)
-    created_at = Column(DateTime(timezone=True), default=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     user = relationship("User", back_populates="audios")
+    source_message = relationship("Message", back_populates="generated_audio")
+
+    __table_args__ = (
+        # Listing scans per-user newest-first; index order avoids the sort
+        Index('ix_generated_audio_user_id_created_at', 'user_id', 'created_at'),
+        # One audio per source message; also serves the TTS-trigger lookup
+        Index('ix_generated_audio_source_message_id', 'source_message_id', unique=True),
+    )
 
 
 class GeneratedImage(Base):
     __tablename__ = "generated_images"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     storage_path = Column(String, nullable=False) # Path in R2
@@ -46,17 +51,21 @@ class GeneratedImage(Base):
     quality = Column(String, default="standard")
     cost = Column(Numeric(18, 6), nullable=False, default=0.0)
     
-    created_at = Column(DateTime(timezone=True), default=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     user = relationship("User", back_populates="images")
 
+    __table_args__ = (
+        Index('ix_generated_images_user_id_created_at', 'user_id', 'created_at'),
+    )
+
 
 
 class GeneratedVideo(Base):
     __tablename__ = "generated_videos"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     
     # Assets
@@ -76,11 +85,19 @@ class GeneratedVideo(Base):
     
     # Economics & Status
     cost = Column(Numeric(18, 6), nullable=False, default=0.0)
-    status = Column(String, default="processing")
+    status = Column(
+        SAEnum("processing", "processing_external", "completed", "failed",
+               name="video_status"),
+        default="processing",
+    )
     error_message = Column(Text, nullable=True)
     
-    created_at = Column(DateTime(timezone=True), default=utc_now)
-    updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
-    user = relationship("User", back_populates="videos")
\ No newline at end of file
+    user = relationship("User", back_populates="videos")
+
+    __table_args__ = (
+        Index('ix_generated_videos_user_id_created_at', 'user_id', 'created_at'),
+    )
\ No newline at end of file
@@ -1,17 +1,13 @@
-import uuid
-from datetime import datetime, timezone
-from sqlalchemy import Column, String, Boolean, DateTime, Numeric, Text
+from sqlalchemy import Column, String, Boolean, DateTime, Numeric, Text, func
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from app.core.database import Base
-
-def utc_now():
-    return datetime.now(timezone.utc)
+from app.core.uuid7 import uuid7
 
 class Package(Base):
     __tablename__ = "packages"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     
     # Package Details
     name = Column(String, nullable=False, index=True)
@@ -26,6 +22,6 @@ class Package(Base):
     is_active = Column(Boolean, default=True)
     is_featured = Column(Boolean, default=False)
 
-    created_at = Column(DateTime(timezone=True), default=utc_now)
-    updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     transactions = relationship("Transaction", back_populates="package")
\ No newline at end of file
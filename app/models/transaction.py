@@ -1,17 +1,15 @@
-import uuid
-from datetime import datetime, timezone
-from sqlalchemy import Column, String, ForeignKey, Numeric, DateTime
+from sqlalchemy import Column, String, ForeignKey, Numeric, DateTime, Index, func
+from sqlalchemy import Enum as SAEnum
+from sqlalchemy import text as sa_text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
-
-def utc_now():
-    return datetime.now(timezone.utc)
+from app.core.uuid7 import uuid7
 
 class Transaction(Base):
     __tablename__ = "transactions"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
     package_id = Column(UUID(as_uuid=True), ForeignKey("packages.id"), nullable=True)
     
@@ -27,12 +25,28 @@ class Transaction(Base):
     currency = Column(String, default="usd")
     credits_added = Column(Numeric(18, 6), nullable=False)
     
-    # Status: pending, completed, failed
-    status = Column(String, default="pending", index=True)
+    # Status: pending, completed, failed (native enum keeps the hot
+    # status filters and indexes on 4-byte values instead of text)
+    status = Column(
+        SAEnum("pending", "completed", "failed", name="transaction_status"),
+        default="pending", index=True,
+    )
     
-    created_at = Column(DateTime(timezone=True), default=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="transactions")
-    package = relationship("Package", back_populates="transactions")
\ No newline at end of file
+    package = relationship("Package", back_populates="transactions")
+
+    __table_args__ = (
+        # Admin revenue aggregates only ever look at completed rows, so a
+        # partial index keeps just those and stays much smaller than
+        # indexing every status
+        Index(
+            'ix_transactions_completed_created_at', 'created_at',
+            postgresql_where=sa_text("status = 'completed'"),
+        ),
+        # Per-user payment history, newest first
+        Index('ix_transactions_user_id_created_at', 'user_id', 'created_at'),
+    )
\ No newline at end of file
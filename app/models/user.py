@@ -1,26 +1,27 @@
-import uuid
-from datetime import datetime, timezone
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Numeric, text
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Numeric, text, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.core.database import Base
-
-def utc_now():
-    return datetime.now(timezone.utc)
+from app.core.uuid7 import uuid7
 
 class User(Base):
     __tablename__ = "users"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=True)
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True, server_default=text("true"), nullable=False)
     is_superuser = Column(Boolean, default=False, server_default=text("false"), nullable=False)
-    created_at = Column(DateTime(timezone=True), default=utc_now)
-    updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
-    wallet = relationship("Wallet", back_populates="user", uselist=False, cascade="all, delete-orphan")
+    # 1:1 and read on nearly every authed request — join it by default so
+    # async access never trips implicit IO after the session closes
+    wallet = relationship(
+        "Wallet", back_populates="user", uselist=False,
+        cascade="all, delete-orphan", lazy="joined",
+    )
     chats = relationship("Chat", back_populates="user", cascade="all, delete-orphan")
     audios = relationship("GeneratedAudio", back_populates="user", cascade="all, delete-orphan")
     images = relationship("GeneratedImage", back_populates="user", cascade="all, delete-orphan")
@@ -31,9 +32,9 @@ class User(Base):
 class Wallet(Base):
     __tablename__ = "wallets"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4, index=True)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid7, index=True)
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), unique=True, nullable=False)
     credits = Column(Numeric(18, 6), default=10.000000, server_default=text("10.0"), nullable=False)
-    updated_at = Column(DateTime(timezone=True), default=utc_now, onupdate=utc_now)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     user = relationship("User", back_populates="wallet")
\ No newline at end of file
@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+import orjson
+import redis.asyncio as redis
+from sqlalchemy import insert
+
+from app.core.database import async_session_maker
+from app.core.redis import redis_pool
+from app.core.uuid7 import uuid7
+from app.models.chat import Message
+
+logger = logging.getLogger(__name__)
+
+# Flush whichever comes first: a full batch or the queue-time window.
+MAX_BATCH_SIZE = 32
+MAX_QUEUE_TIME = 0.01  # seconds
+
+
+class MessageBatcher:
+    """
+    Coalesces Message inserts from concurrent WebSocket sessions into
+    single executemany flushes (and their Redis history appends into one
+    pipeline), amortizing the per-row commit and round-trip cost.
+    """
+
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+        self.redis: Optional[redis.Redis] = None
+        self.cache_ttl = 3600
+
+    def start(self):
+        """Start the background flush loop (call once at app startup)."""
+        if self._task is None:
+            self.redis = redis.Redis(connection_pool=redis_pool)
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the loop, draining anything still queued."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Drain remaining items so no accepted message is lost on shutdown
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        if leftover:
+            await self._flush(leftover)
+
+        if self.redis is not None:
+            await self.redis.aclose()
+            self.redis = None
+
+    async def add_message(
+        self,
+        chat_id: uuid.UUID,
+        role: str,
+        content: str,
+        model: Optional[str] = None,
+        attachments: Optional[list] = None,
+        tokens: int = 0,
+        cost=0,
+        cache: bool = False,
+    ) -> "asyncio.Future[bool]":
+        """
+        Queue a message row for insertion. Returns a future resolving to
+        True/False once the row's batch has been flushed; callers that
+        don't need confirmation can simply ignore it.
+
+        The row is fully materialized here (id, created_at) so ordering
+        within a turn doesn't depend on when the batch lands.
+        """
+        done: asyncio.Future = asyncio.get_running_loop().create_future()
+        row = {
+            "id": uuid7(),
+            "chat_id": chat_id,
+            "role": role,
+            "content": content,
+            "model": model,
+            "attachments": attachments or [],
+            "tokens": tokens,
+            "cost": cost,
+            "created_at": datetime.now(timezone.utc),
+        }
+        self._queue.put_nowait((row, cache, done))
+        return done
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch: List[Tuple[dict, bool, asyncio.Future]] = [await self._queue.get()]
+            deadline = loop.time() + MAX_QUEUE_TIME
+            while len(batch) < MAX_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Message batch flush failed: {e}")
+                for _, _, done in batch:
+                    if not done.done():
+                        done.set_result(False)
+
+    async def _flush(self, batch):
+        rows = [row for row, _, _ in batch]
+        try:
+            async with async_session_maker() as db:
+                await db.execute(insert(Message), rows)
+                await db.commit()
+            results = [True] * len(batch)
+        except Exception as e:
+            # One poisoned row (e.g. its chat was deleted during the
+            # flush window) rolls back the whole executemany; retry
+            # row-by-row so unrelated messages still land.
+            logger.warning(
+                f"Batched message insert failed ({len(rows)} rows), retrying individually: {e}"
+            )
+            results = await self._flush_rows_individually(rows)
+
+        # Redis appends are best-effort, one pipeline for the whole batch;
+        # only rows that actually landed get cached.
+        if self.redis is not None and any(results):
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for (row, cache, _), ok in zip(batch, results):
+                    if ok and cache:
+                        key = f"chat:{row['chat_id']}:history"
+                        pipe.rpush(key, orjson.dumps({"role": row["role"], "content": row["content"]}))
+                        pipe.expire(key, self.cache_ttl)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Batched cache append failed: {e}")
+
+        for (_, _, done), ok in zip(batch, results):
+            if not done.done():
+                done.set_result(ok)
+
+    async def _flush_rows_individually(self, rows) -> List[bool]:
+        """Fallback path: insert each row in its own transaction."""
+        results = []
+        async with async_session_maker() as db:
+            for row in rows:
+                try:
+                    await db.execute(insert(Message), [row])
+                    await db.commit()
+                    results.append(True)
+                except Exception as e:
+                    await db.rollback()
+                    logger.error(f"Dropping message row for chat {row['chat_id']}: {e}")
+                    results.append(False)
+        return results
+
+
+# Shared instance, started from the app lifecycle hooks
+message_batcher = MessageBatcher()
@@ -2,6 +2,7 @@ import io
 import base64
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
 from PIL import Image
 import PyPDF2
 
@@ -13,14 +14,16 @@ except ImportError:
 
 MAX_IMAGE_SIZE = 1024 * 1024 * 4  # 4MB limit for processing
 MAX_TEXT_LENGTH = 100_000  # Character limit to prevent context overflow
+MAX_UPLOAD_BYTES = MAX_IMAGE_SIZE * 2  # Hard cap on what we buffer per upload
+_READ_CHUNK = 64 * 1024
 
 # Whitelist of code extensions to treat as text, even if MIME is generic
-CODE_EXTENSIONS = {
-    '.py', '.js', '.jsx', '.ts', '.tsx', '.c', '.cpp', '.h', '.hpp', 
-    '.java', '.rs', '.go', '.rb', '.php', '.sh', '.bat', '.ps1', 
-    '.html', '.css', '.scss', '.sql', '.json', '.yaml', '.yml', 
+CODE_EXTENSIONS = frozenset({
+    '.py', '.js', '.jsx', '.ts', '.tsx', '.c', '.cpp', '.h', '.hpp',
+    '.java', '.rs', '.go', '.rb', '.php', '.sh', '.bat', '.ps1',
+    '.html', '.css', '.scss', '.sql', '.json', '.yaml', '.yml',
     '.xml', '.md', '.txt', '.env', '.gitignore', '.dockerfile', '.conf', '.ini'
-}
+})
 
 async def process_file(file: UploadFile) -> dict:
     """
@@ -31,22 +34,33 @@ async def process_file(file: UploadFile) -> dict:
     filename = file.filename
     file_ext = Path(filename).suffix.lower()
     
-    # Read file into memory
-    file_bytes = await file.read()
-    
+    # Read in bounded chunks so an oversized upload is rejected after
+    # MAX_UPLOAD_BYTES instead of being buffered whole first.
+    buf = bytearray()
+    while chunk := await file.read(_READ_CHUNK):
+        buf.extend(chunk)
+        if len(buf) > MAX_UPLOAD_BYTES:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)"
+            )
+    file_bytes = bytes(buf)
+
     try:
+        # PIL decode/resize/encode and PDF/docx parsing are CPU-bound;
+        # run them on the threadpool so the event loop keeps serving
+        # other requests during the compute.
+
         # Handle Images
         if content_type.startswith("image/"):
-            return _process_image(file_bytes, content_type)
-        
-        # Handle PDFs
-        elif content_type == "application/pdf" or file_ext == ".pdf":
-            text = _extract_pdf_text(file_bytes)
-            return _wrap_text_content(filename, text)
+            return await run_in_threadpool(_process_image, file_bytes, content_type)
 
-        # Handle Word Docs (.docx)
-        elif file_ext == ".docx":
-            text = _extract_docx_text(file_bytes)
+        # Handle PDFs / Word docs via the extractor table
+        extractor = _DOC_EXTRACTORS.get(
+            ".pdf" if content_type == "application/pdf" else file_ext
+        )
+        if extractor is not None:
+            text = await run_in_threadpool(extractor, file_bytes)
             return _wrap_text_content(filename, text)
 
         # Handle Text / Code / JSON / CSV
@@ -96,31 +110,46 @@ def _process_image(file_bytes: bytes, mime_type: str) -> dict:
     """Resize image if too large and convert to base64"""
     try:
         image = Image.open(io.BytesIO(file_bytes))
-        
-        # Resize if dimension is massive (to save tokens/bandwidth)
-        max_dim = 2048
-        if image.width > max_dim or image.height > max_dim:
-            image.thumbnail((max_dim, max_dim))
-            
-        # Convert back to bytes
-        buffer = io.BytesIO()
-        # Convert to RGB if saving as JPEG (removes alpha channel)
-        if mime_type == "image/jpeg" and image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
-            
+
         format_mapping = {
             "image/jpeg": "JPEG",
             "image/png": "PNG",
             "image/webp": "WEBP",
             "image/gif": "GIF"
         }
-        save_format = format_mapping.get(mime_type, "PNG")
-        
-        image.save(buffer, format=save_format, optimize=True)
-        
-        # Base64 encode
-        img_str = base64.b64encode(buffer.getvalue()).decode("utf-8")
-        
+
+        # Resize if dimension is massive (to save tokens/bandwidth)
+        max_dim = 2048
+        if (
+            image.width <= max_dim
+            and image.height <= max_dim
+            and mime_type in format_mapping
+        ):
+            # Already within bounds and a format we'd keep as-is: skip the
+            # full decode/re-encode round trip and base64 the original bytes.
+            img_str = base64.b64encode(file_bytes).decode("ascii")
+        else:
+            if image.width > max_dim or image.height > max_dim:
+                image.thumbnail((max_dim, max_dim))
+
+            # Convert back to bytes
+            buffer = io.BytesIO()
+            # Convert to RGB if saving as JPEG (removes alpha channel)
+            if mime_type == "image/jpeg" and image.mode in ("RGBA", "P"):
+                image = image.convert("RGB")
+
+            save_format = format_mapping.get(mime_type, "PNG")
+
+            if save_format == "JPEG":
+                # optimize=True makes libjpeg do a second full encoding pass
+                # for marginal size savings — not worth it on the hot path.
+                image.save(buffer, format=save_format, quality=85, progressive=False)
+            else:
+                image.save(buffer, format=save_format, optimize=True)
+
+            # Encode straight from the buffer's memoryview — no getvalue() copy
+            img_str = base64.b64encode(buffer.getbuffer()).decode("ascii")
+
         return {
             "type": "image",
             "mime_type": mime_type,
@@ -132,13 +161,19 @@ def _process_image(file_bytes: bytes, mime_type: str) -> dict:
 def _extract_pdf_text(file_bytes: bytes) -> str:
     try:
         pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_bytes))
-        text = ""
+        parts = []
+        total = 0
         # Limit to first 20 pages to prevent context explosion
-        for page in pdf_reader.pages[:20]: 
+        for page in pdf_reader.pages[:20]:
             extracted = page.extract_text()
             if extracted:
-                text += extracted + "\n"
-        return text or "[PDF contained no readable text]"
+                parts.append(extracted)
+                total += len(extracted)
+                # Everything past MAX_TEXT_LENGTH gets truncated anyway,
+                # so don't pay for extracting the remaining pages.
+                if total >= MAX_TEXT_LENGTH:
+                    break
+        return "\n".join(parts) or "[PDF contained no readable text]"
     except Exception:
         return "[Error extracting PDF text]"
 
@@ -149,8 +184,20 @@ def _extract_docx_text(file_bytes: bytes) -> str:
     try:
         doc = docx.Document(io.BytesIO(file_bytes))
         full_text = []
+        total = 0
         for para in doc.paragraphs:
             full_text.append(para.text)
+            total += len(para.text)
+            if total >= MAX_TEXT_LENGTH:
+                break
         return "\n".join(full_text)
     except Exception:
-        return "[Error extracting Word document text]"
\ No newline at end of file
+        return "[Error extracting Word document text]"
+
+
+# Extension -> extractor dispatch for document types (keeps process_file's
+# routing to a dict lookup instead of a chain of string comparisons).
+_DOC_EXTRACTORS = {
+    ".pdf": _extract_pdf_text,
+    ".docx": _extract_docx_text,
+}
\ No newline at end of file
@@ -6,12 +6,24 @@ from app.services.llm.base import LLMProvider, PromptType
 from app.services.llm.usage import Usage
 from app.services.llm.schema import ChatMessage
 
+# Parsed once at import: wallet precision quantum and the per-1M divisor
+_CREDIT_QUANT = Decimal("0.000001")
+_PER_MILLION = Decimal("1000000")
+
 class ClaudeAdapter(LLMProvider):
     _client: anthropic.AsyncAnthropic | None = None
     
     PROFIT_MARGIN = Decimal("4.0")
     USD_TO_CREDITS_RATE = Decimal("10.0")
 
+    # Anthropic's prompt-cache billing relative to the input rate
+    CACHE_READ_MULTIPLIER = Decimal("0.1")
+    CACHE_WRITE_MULTIPLIER = Decimal("1.25")
+
+    # Prefixes below ~1024 tokens aren't cacheable, so don't pay the
+    # cache-write premium on short conversations (~4 chars/token).
+    _CACHE_MIN_CHARS = 4096
+
     def __init__(self):
         if not ClaudeAdapter._client:
             ClaudeAdapter._client = anthropic.AsyncAnthropic(
@@ -32,44 +44,51 @@ class ClaudeAdapter(LLMProvider):
             "claude-4.5-haiku": "claude-haiku-4-5-20251001",
         }
 
+        # Per-token credit rates with margin and USD->credits folded in
+        scale = self.PROFIT_MARGIN * self.USD_TO_CREDITS_RATE / _PER_MILLION
+        self.credit_rates = {
+            name: (tier["input"] * scale, tier["output"] * scale)
+            for name, tier in self.pricing.items()
+        }
+
     def calculate_cost(self, usage: Usage, model: str) -> Decimal:
         """
         Calculates Price to User (Cost * Margin).
+        Cache reads bill at 0.1x the input rate, cache writes at 1.25x.
         """
-        price_tier = self.pricing.get(model, self.pricing["claude-4.5-sonnet"])
-        
-        input_cost = (Decimal(usage.prompt_tokens) / Decimal("1000000")) * price_tier["input"]
-        output_cost = (Decimal(usage.completion_tokens) / Decimal("1000000")) * price_tier["output"]
-        
-        base_cost = input_cost + output_cost
-        total_price_in_usd = base_cost * self.PROFIT_MARGIN
-        total_price_to_user = total_price_in_usd * self.USD_TO_CREDITS_RATE
+        in_rate, out_rate = self.credit_rates.get(model, self.credit_rates["claude-4.5-sonnet"])
 
-        return total_price_to_user.quantize(Decimal("0.000001"))
+        total_price_to_user = usage.prompt_tokens * in_rate + usage.completion_tokens * out_rate
+        if usage.cache_read_input_tokens:
+            total_price_to_user += usage.cache_read_input_tokens * in_rate * self.CACHE_READ_MULTIPLIER
+        if usage.cache_creation_input_tokens:
+            total_price_to_user += usage.cache_creation_input_tokens * in_rate * self.CACHE_WRITE_MULTIPLIER
 
-    def _prepare_claude_request(self, prompt: PromptType) -> Tuple[str, List[Dict[str, Any]]]:
-        system_prompt = ""
-        messages = []
-        items = []
+        return total_price_to_user.quantize(_CREDIT_QUANT)
 
+    def _prepare_claude_request(self, prompt: PromptType) -> Tuple[str, List[Dict[str, Any]]]:
         if isinstance(prompt, str):
             return "", [{"role": "user", "content": prompt}]
-        else:
-            items = prompt
 
-        for item in items:
-            role = ""
-            content_blocks: List[Dict[str, Any]] = []
+        # Hot loop over the full history each turn: locally bound appends,
+        # exact type check first (ChatMessage is the overwhelmingly common
+        # case) and list-built system prompt keep per-item overhead down.
+        sys_parts: List[str] = []
+        messages: List[Dict[str, Any]] = []
+        add_message = messages.append
 
+        for item in prompt:
             # 1. Parse Input Item
-            if isinstance(item, ChatMessage):
+            if type(item) is ChatMessage:
                 role = item.role
-                
+                content_blocks: List[Dict[str, Any]] = []
+                add_block = content_blocks.append
+
                 # Add Attachments first (Images then Text)
                 if item.attachments:
                     for att in item.attachments:
                         if att.type == "image":
-                            content_blocks.append({
+                            add_block({
                                 "type": "image",
                                 "source": {
                                     "type": "base64",
@@ -78,41 +97,74 @@ class ClaudeAdapter(LLMProvider):
                                 }
                             })
                         elif att.type == "text":
-                            content_blocks.append({
+                            add_block({
                                 "type": "text",
-                                "text": f"<file_context>\n{att.content}\n</file_context>"
+                                "text": "".join(("<file_context>\n", att.content, "\n</file_context>"))
                             })
-                
+
                 # Add main text
-                text_body = "".join(b.text for b in item.content)
+                text_body = "".join([b.text for b in item.content])
                 if text_body:
-                    content_blocks.append({
-                        "type": "text", 
-                        "text": text_body
-                    })
+                    add_block({"type": "text", "text": text_body})
 
             elif isinstance(item, dict):
                 role = item.get("role", "user")
                 text_content = item.get("content", "")
-                if text_content:
-                    content_blocks.append({"type": "text", "text": text_content})
+                content_blocks = (
+                    [{"type": "text", "text": text_content}] if text_content else []
+                )
+
+            else:
+                continue
 
             # 2. Assign to specific role
-            if role == "system":
-                # Claude handles system prompt via top-level parameter
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        system_prompt += block["text"] + "\n"
-            
-            elif role == "user":
+            if role == "user":
                 if content_blocks:
-                    messages.append({"role": "user", "content": content_blocks})
-            
-            elif role in ["ai", "assistant"]:
+                    add_message({"role": "user", "content": content_blocks})
+
+            elif role in ("ai", "assistant"):
                 if content_blocks:
-                    messages.append({"role": "assistant", "content": content_blocks})
+                    add_message({"role": "assistant", "content": content_blocks})
 
-        return system_prompt.strip(), messages
+            elif role == "system":
+                # Claude handles system prompt via top-level parameter
+                sys_parts.extend(
+                    block["text"] for block in content_blocks if block["type"] == "text"
+                )
+
+        return "\n".join(sys_parts).strip(), messages
+
+    def _apply_prompt_caching(
+        self, system_prompt: str, messages: List[Dict[str, Any]]
+    ) -> Tuple[Any, List[Dict[str, Any]]]:
+        """
+        Mark the stable prefix (system + conversation so far) with
+        cache_control so repeat turns hit Anthropic's 5-minute prefix
+        cache and bill cached tokens at a tenth of the input rate.
+        Skipped for prompts too short to be cacheable.
+        """
+        approx_chars = len(system_prompt) + sum(
+            len(block.get("text", ""))
+            for msg in messages
+            if isinstance(msg["content"], list)
+            for block in msg["content"]
+        )
+        if approx_chars < self._CACHE_MIN_CHARS:
+            return system_prompt, messages
+
+        system: Any = system_prompt
+        if system_prompt:
+            system = [{
+                "type": "text",
+                "text": system_prompt,
+                "cache_control": {"type": "ephemeral"},
+            }]
+        if messages and isinstance(messages[-1]["content"], list) and messages[-1]["content"]:
+            # Breakpoint on the final block: everything up to and
+            # including it becomes the cached prefix for the next turn.
+            blocks = messages[-1]["content"]
+            blocks[-1] = {**blocks[-1], "cache_control": {"type": "ephemeral"}}
+        return system, messages
 
     def _get_api_model_id(self, model: str) -> str:
         return self.model_mapping.get(model, "claude-sonnet-4-5-20250929")
@@ -125,15 +177,16 @@ class ClaudeAdapter(LLMProvider):
     ) -> AsyncGenerator[str, None]:
         
         system_prompt, messages = self._prepare_claude_request(prompt)
+        system, messages = self._apply_prompt_caching(system_prompt, messages)
         api_model = self._get_api_model_id(model)
 
         async with self.client.messages.stream(
             max_tokens=4096,
-            system=system_prompt,
+            system=system,
             messages=messages,
             model=api_model,
         ) as stream:
-            
+
             async for text in stream.text_stream:
                 yield text
 
@@ -141,6 +194,10 @@ class ClaudeAdapter(LLMProvider):
             if final_message.usage:
                 usage.prompt_tokens = final_message.usage.input_tokens
                 usage.completion_tokens = final_message.usage.output_tokens
+                usage.cache_read_input_tokens = getattr(
+                    final_message.usage, "cache_read_input_tokens", 0) or 0
+                usage.cache_creation_input_tokens = getattr(
+                    final_message.usage, "cache_creation_input_tokens", 0) or 0
 
     async def generate_text(
         self,
@@ -149,11 +206,12 @@ class ClaudeAdapter(LLMProvider):
         usage: Usage
     ) -> str:
         system_prompt, messages = self._prepare_claude_request(prompt)
+        system, messages = self._apply_prompt_caching(system_prompt, messages)
         api_model = self._get_api_model_id(model)
 
         response = await self.client.messages.create(
             max_tokens=4096,
-            system=system_prompt,
+            system=system,
             messages=messages,
             model=api_model,
         )
@@ -161,7 +219,15 @@ class ClaudeAdapter(LLMProvider):
         if response.usage:
             usage.prompt_tokens = response.usage.input_tokens
             usage.completion_tokens = response.usage.output_tokens
-
-        if response.content:
-            return "".join(block.text for block in response.content if block.type == "text")
+            usage.cache_read_input_tokens = getattr(
+                response.usage, "cache_read_input_tokens", 0) or 0
+            usage.cache_creation_input_tokens = getattr(
+                response.usage, "cache_creation_input_tokens", 0) or 0
+
+        content = response.content
+        if content:
+            # Single text block is the overwhelmingly common shape
+            if len(content) == 1 and content[0].type == "text":
+                return content[0].text
+            return "".join([block.text for block in content if block.type == "text"])
         return ""
\ No newline at end of file
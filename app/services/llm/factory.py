@@ -1,29 +1,41 @@
+from functools import lru_cache
+
 from app.services.llm.base import LLMProvider
 from app.services.llm.openai_adapter import OpenAIAdapter
 from app.services.llm.gemini_adapter import GeminiAdapter
 from app.services.llm.claude_adapter import ClaudeAdapter
 
+# Prefix -> adapter class, walked once per (cached) model string
+_PREFIX_DISPATCH = (
+    ("gpt", OpenAIAdapter),
+    ("gemini", GeminiAdapter),
+    ("claude", ClaudeAdapter),
+)
+
+# One adapter per class for the whole process: every model string of a
+# provider shares the same instance (and its prebuilt pricing tables)
+_INSTANCES: dict[type, LLMProvider] = {}
+
+
 class LLMFactory:
     """
     The Factory is responsible for selecting the right AI Provider
     based on the requested model string.
     """
-    
+
     @staticmethod
+    @lru_cache(maxsize=32)
     def get_provider(model: str) -> LLMProvider:
         model_id = model.lower()
 
-        if model_id.startswith("gpt"):
-            return OpenAIAdapter()
-        
-        elif model_id.startswith("gemini"):
-            return GeminiAdapter()
-        
-        elif model_id.startswith("claude"):
-            return ClaudeAdapter()
-        
-        else:
-            raise ValueError(f"Unsupported AI Model: {model}")
+        for prefix, adapter_cls in _PREFIX_DISPATCH:
+            if model_id.startswith(prefix):
+                instance = _INSTANCES.get(adapter_cls)
+                if instance is None:
+                    instance = _INSTANCES[adapter_cls] = adapter_cls()
+                return instance
+
+        raise ValueError(f"Unsupported AI Model: {model}")
 
     @staticmethod
     def get_all_models():
@@ -1,4 +1,3 @@
-import base64
 from google import genai
 from google.genai import types
 from decimal import Decimal
@@ -8,6 +7,10 @@ from app.services.llm.base import LLMProvider, PromptType
 from app.services.llm.usage import Usage
 from app.services.llm.schema import ChatMessage
 
+# Parsed once at import: wallet precision quantum and the per-1M divisor
+_CREDIT_QUANT = Decimal("0.000001")
+_PER_MILLION = Decimal("1000000")
+
 class GeminiAdapter(LLMProvider):
     _client: genai.Client | None = None
     
@@ -40,20 +43,22 @@ class GeminiAdapter(LLMProvider):
         }
 
 
+        # Per-token credit rates with margin and USD->credits folded in
+        scale = self.PROFIT_MARGIN * self.USD_TO_CREDITS_RATE / _PER_MILLION
+        self.credit_rates = {
+            name: (tier["input"] * scale, tier["output"] * scale)
+            for name, tier in self.pricing.items()
+        }
+
     def calculate_cost(self, usage: Usage, model: str) -> Decimal:
         """
         Calculates Price to User (Cost * Margin).
         """
-        price_tier = self.pricing.get(model, self.pricing["gemini-3-flash-preview"])
-        
-        input_cost = (Decimal(usage.prompt_tokens) / Decimal("1000000")) * price_tier["input"]
-        output_cost = (Decimal(usage.completion_tokens) / Decimal("1000000")) * price_tier["output"]
-        
-        base_cost = input_cost + output_cost
-        total_price_in_usd = base_cost * self.PROFIT_MARGIN
-        total_price_to_user = total_price_in_usd * self.USD_TO_CREDITS_RATE
-        
-        return total_price_to_user.quantize(Decimal("0.000001"))
+        in_rate, out_rate = self.credit_rates.get(model, self.credit_rates["gemini-3-flash-preview"])
+
+        total_price_to_user = usage.prompt_tokens * in_rate + usage.completion_tokens * out_rate
+
+        return total_price_to_user.quantize(_CREDIT_QUANT)
 
     def _prepare_gemini_request(self, prompt: PromptType) -> Tuple[str | None, List[types.Content]]:
         system_parts = []
@@ -80,7 +85,7 @@ class GeminiAdapter(LLMProvider):
             # 2. Build Parts from Content & Attachments
             if isinstance(item, ChatMessage):
                 # Add main text content
-                text_content = "".join(b.text for b in item.content)
+                text_content = "".join([b.text for b in item.content])
                 if text_content:
                     parts.append(types.Part.from_text(text=text_content))
                 
@@ -91,10 +96,8 @@ class GeminiAdapter(LLMProvider):
                             # Combine text attachments into a text part
                             parts.append(types.Part.from_text(text=f"\n[Attachment: {att.content}]"))
                         elif att.type == "image":
-                            # Decode base64 string to bytes for Gemini SDK
-                            img_bytes = base64.b64decode(att.content)
                             parts.append(types.Part.from_bytes(
-                                data=img_bytes, 
+                                data=att.raw_bytes(),
                                 mime_type=att.mime_type or "image/jpeg"
                             ))
             elif isinstance(item, dict):
@@ -131,16 +134,9 @@ class GeminiAdapter(LLMProvider):
             system_instruction=system_inst
         ) if system_inst else None
 
-        # Count Tokens
-        try:
-            count_resp = await self.client.aio.models.count_tokens(
-                model=model,
-                contents=contents
-            )
-            usage.prompt_tokens = count_resp.total_tokens
-        except Exception:
-            pass
-
+        # No pre-flight count_tokens round-trip: the stream's final chunk
+        # carries usage_metadata.prompt_token_count, and callers fall back
+        # to Usage.ensure_validity if the API omits it.
         response_stream = await self.client.aio.models.generate_content_stream(
             model=model,
             contents=contents,
@@ -153,8 +149,7 @@ class GeminiAdapter(LLMProvider):
 
             if chunk.usage_metadata:
                 usage.completion_tokens = chunk.usage_metadata.candidates_token_count
-                if usage.prompt_tokens == 0:
-                    usage.prompt_tokens = chunk.usage_metadata.prompt_token_count
+                usage.prompt_tokens = chunk.usage_metadata.prompt_token_count or 0
 
     async def generate_text(
         self,
@@ -167,22 +162,14 @@ class GeminiAdapter(LLMProvider):
             system_instruction=system_inst
         ) if system_inst else None
 
-        try:
-            count_resp = await self.client.aio.models.count_tokens(
-                model=model,
-                contents=contents
-            )
-            usage.prompt_tokens = count_resp.total_tokens
-        except Exception:
-            pass
-
         response = await self.client.aio.models.generate_content(
             model=model,
             contents=contents,
             config=config
         )
-        
+
         if response.usage_metadata:
+            usage.prompt_tokens = response.usage_metadata.prompt_token_count or 0
             usage.completion_tokens = response.usage_metadata.candidates_token_count
-            
+
         return response.text or ""
\ No newline at end of file
@@ -1,12 +1,17 @@
 import json
 import openai
 from decimal import Decimal
+from hashlib import blake2b
 from typing import AsyncGenerator, List, Dict, Union
 from app.core.config import settings
 from app.services.llm.base import LLMProvider, PromptType
 from app.services.llm.usage import Usage
 from app.services.llm.schema import ChatMessage
 
+# Parsed once at import: wallet precision quantum and the per-1M divisor
+_CREDIT_QUANT = Decimal("0.000001")
+_PER_MILLION = Decimal("1000000")
+
 class OpenAIAdapter(LLMProvider):
     _client: openai.AsyncOpenAI | None = None
 
@@ -14,6 +19,13 @@ class OpenAIAdapter(LLMProvider):
     PROFIT_MARGIN = Decimal("4.0")
     USD_TO_CREDITS_RATE = Decimal("10.0")
 
+    # Cached input bills at a tenth of the regular input rate
+    CACHED_INPUT_MULTIPLIER = Decimal("0.1")
+
+    # Prefixes under ~1024 tokens can't hit the prompt cache, so skip
+    # the routing hint for short conversations (~4 chars/token)
+    _CACHE_MIN_CHARS = 4096
+
     def __init__(self):
         if not OpenAIAdapter._client:
             OpenAIAdapter._client = openai.AsyncOpenAI(
@@ -28,27 +40,29 @@ class OpenAIAdapter(LLMProvider):
             "gpt-5-mini": {"input": Decimal("0.25"), "output": Decimal("2.00")},
         }
 
+        # Per-token credit rates with margin and USD->credits conversion
+        # folded in, so the per-turn cost is just two multiplications.
+        scale = self.PROFIT_MARGIN * self.USD_TO_CREDITS_RATE / _PER_MILLION
+        self.credit_rates = {
+            name: (tier["input"] * scale, tier["output"] * scale)
+            for name, tier in self.pricing.items()
+        }
+
     def calculate_cost(self, usage: Usage, model: str) -> Decimal:
         """
         Calculates Price to User (Cost * Margin).
         Returns Decimal for high precision.
         """
-        price_tier = self.pricing.get(model, self.pricing["gpt-5.2"])
-        
-        # Calculate Base Provider Cost
-        input_cost = (Decimal(usage.prompt_tokens) / Decimal("1000000")) * price_tier["input"]
-        output_cost = (Decimal(usage.completion_tokens) / Decimal("1000000")) * price_tier["output"]
-        
-        base_cost = input_cost + output_cost
-        
-        # Apply Profit Margin
-        total_price_in_usd = base_cost * self.PROFIT_MARGIN
+        in_rate, out_rate = self.credit_rates.get(model, self.credit_rates["gpt-5.2"])
+
+        total_price_to_user = usage.prompt_tokens * in_rate + usage.completion_tokens * out_rate
+        if usage.cache_read_input_tokens:
+            total_price_to_user += (
+                usage.cache_read_input_tokens * in_rate * self.CACHED_INPUT_MULTIPLIER
+            )
 
-        # Convert USD to Credits
-        total_price_to_user = total_price_in_usd * self.USD_TO_CREDITS_RATE
-        
         # Round to 6 decimal places to match DB
-        return total_price_to_user.quantize(Decimal("0.000001"))
+        return total_price_to_user.quantize(_CREDIT_QUANT)
 
     def _to_openai_messages(self, prompt: PromptType) -> List[Dict[str, Union[str, list]]]:
         messages = []
@@ -70,6 +84,36 @@ class OpenAIAdapter(LLMProvider):
                 
         return messages
 
+    def _prompt_cache_key(self, messages: List[Dict]) -> str | None:
+        """
+        Stable routing hint for OpenAI's prompt cache: conversations share
+        their opening message, so hashing it (canonical key order) lands
+        every turn of a thread on the same cache shard. Returns None for
+        prompts too short to be cacheable.
+        """
+        total_chars = 0
+        for m in messages:
+            content = m.get("content")
+            if isinstance(content, str):
+                total_chars += len(content)
+            elif isinstance(content, list):
+                for part in content:
+                    if isinstance(part, dict):
+                        total_chars += len(part.get("text") or "")
+        if total_chars < self._CACHE_MIN_CHARS or not messages:
+            return None
+        seed = json.dumps(messages[0], sort_keys=True, default=str)
+        return blake2b(seed.encode(), digest_size=16).hexdigest()
+
+    @staticmethod
+    def _record_usage(usage: Usage, api_usage) -> None:
+        """Split cached prompt tokens out so they bill at the cached rate."""
+        details = getattr(api_usage, "prompt_tokens_details", None)
+        cached = (getattr(details, "cached_tokens", 0) or 0) if details else 0
+        usage.prompt_tokens = api_usage.prompt_tokens - cached
+        usage.completion_tokens = api_usage.completion_tokens
+        usage.cache_read_input_tokens = cached
+
     async def generate_stream(
         self,
         prompt: PromptType,
@@ -81,11 +125,17 @@ class OpenAIAdapter(LLMProvider):
         # Fallback logic for model name
         api_model = model if model in self.pricing else "gpt-5.2-mini"
 
+        kwargs = {}
+        cache_key = self._prompt_cache_key(openai_messages)
+        if cache_key:
+            kwargs["prompt_cache_key"] = cache_key
+
         stream = await self.client.chat.completions.create(
             model=api_model,
             messages=openai_messages,
             stream=True,
-            stream_options={"include_usage": True}
+            stream_options={"include_usage": True},
+            **kwargs
         )
 
         async for chunk in stream:
@@ -93,8 +143,7 @@ class OpenAIAdapter(LLMProvider):
                 yield chunk.choices[0].delta.content
 
             if chunk.usage:
-                usage.prompt_tokens = chunk.usage.prompt_tokens
-                usage.completion_tokens = chunk.usage.completion_tokens
+                self._record_usage(usage, chunk.usage)
 
     async def generate_text(
         self,
@@ -104,15 +153,20 @@ class OpenAIAdapter(LLMProvider):
     ) -> str:
         openai_messages = self._to_openai_messages(prompt)
         api_model = model if model in self.pricing else "gpt-5.2-mini"
-        
+
+        kwargs = {}
+        cache_key = self._prompt_cache_key(openai_messages)
+        if cache_key:
+            kwargs["prompt_cache_key"] = cache_key
+
         response = await self.client.chat.completions.create(
             model=api_model,
             messages=openai_messages,
-            stream=False
+            stream=False,
+            **kwargs
         )
-        
+
         if response.usage:
-            usage.prompt_tokens = response.usage.prompt_tokens
-            usage.completion_tokens = response.usage.completion_tokens
-            
+            self._record_usage(usage, response.usage)
+
         return response.choices[0].message.content or ""
\ No newline at end of file
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Optional
 import re
 
@@ -84,15 +85,17 @@ class ModelRouter:
         r"\b(report|audit|review|assessment|log analysis)\b"
     ]
 
+    # Compiled once at import so scoring doesn't hit re's cache lookup
+    # on every pattern for every turn.
+    _CODING_RE = [re.compile(p) for p in CODING_PATTERNS]
+    _REASONING_RE = [re.compile(p) for p in REASONING_PATTERNS]
+    _CREATIVE_RE = [re.compile(p) for p in CREATIVE_PATTERNS]
+    _DATA_RE = [re.compile(p) for p in DATA_PATTERNS]
+
     @classmethod
-    def _calculate_score(cls, text: str, patterns: list) -> int:
-        score = 0
-        text_lower = text.lower()
-        for pattern in patterns:
-            # Count how many times these patterns appear
-            matches = re.findall(pattern, text_lower)
-            score += len(matches)
-        return score
+    def _calculate_score(cls, text_lower: str, patterns: list) -> int:
+        # Count how many times these patterns appear
+        return sum(len(p.findall(text_lower)) for p in patterns)
 
     @classmethod
     def determine_model(cls, prompt: str, user_preference: Optional[str] = None) -> str:
@@ -104,11 +107,18 @@ class ModelRouter:
         if user_preference and user_preference.lower() != "auto":
             return user_preference
 
-        # Score the Prompt
-        coding_score = cls._calculate_score(prompt, cls.CODING_PATTERNS)
-        reasoning_score = cls._calculate_score(prompt, cls.REASONING_PATTERNS)
-        creative_score = cls._calculate_score(prompt, cls.CREATIVE_PATTERNS)
-        data_score = cls._calculate_score(prompt, cls.DATA_PATTERNS)
+        return cls._auto_route(prompt)
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def _auto_route(cls, prompt: str) -> str:
+        """Score the prompt and pick a model. Memoized: repeated prompts
+        (retries, regenerations) skip the regex pass entirely."""
+        text_lower = prompt.lower()
+        coding_score = cls._calculate_score(text_lower, cls._CODING_RE)
+        reasoning_score = cls._calculate_score(text_lower, cls._REASONING_RE)
+        creative_score = cls._calculate_score(text_lower, cls._CREATIVE_RE)
+        data_score = cls._calculate_score(text_lower, cls._DATA_RE)
 
         # Decision Logic
 
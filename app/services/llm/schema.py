@@ -1,5 +1,6 @@
+import base64
 from typing import Literal, List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 Role = Literal["system", "user", "assistant", "ai"]
 
@@ -18,22 +19,40 @@ class Attachment(BaseModel):
     content: str
     mime_type: Optional[str] = None
 
+    def raw_bytes(self) -> bytes:
+        """Base64-decoded content. Attachments only ride the freshly
+        built latest message (cached history keeps role/content only),
+        so each one is decoded once per request — no caching needed."""
+        return base64.b64decode(self.content)
+
 class ChatMessage(BaseModel):
     role: Role
     content: List[ContentBlock]
     attachments: Optional[List[Attachment]] = []
 
+    # Lazily computed hash of the joined text, so "same message?" checks
+    # are an O(1) int compare instead of a full string compare.
+    _text_hash: Optional[int] = PrivateAttr(default=None)
+
     @staticmethod
     def from_text(role: str, text: str) -> "ChatMessage":
         """
         Factory method to create a ChatMessage from raw strings.
         Accepts 'role' as a string (e.g. 'ai') and validates it against the Role type.
         """
-        return ChatMessage(
+        msg = ChatMessage(
             role=role,
             content=[ContentBlock(text=text)],
             attachments=[]
         )
+        msg._text_hash = hash(text)
+        return msg
+
+    def text_hash(self) -> int:
+        """Hash of the message's joined text (computed once)."""
+        if self._text_hash is None:
+            self._text_hash = hash("".join([b.text for b in self.content]))
+        return self._text_hash
 
     def to_openai_format(self):
         """
@@ -46,14 +65,14 @@ class ChatMessage(BaseModel):
         # If no attachments, send standard string content (simple format)
         if not self.attachments:
             # Join all text blocks into one string
-            full_text = "".join(b.text for b in self.content)
+            full_text = "".join([b.text for b in self.content])
             return {"role": role_str, "content": full_text}
 
         # If attachments exist, switch to "content parts" format (multimodal)
         content_parts = []
 
         # Add the main text content first
-        text_content = "".join(b.text for b in self.content)
+        text_content = "".join([b.text for b in self.content])
         if text_content:
             content_parts.append({"type": "text", "text": text_content})
 
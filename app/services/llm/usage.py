@@ -9,10 +9,16 @@ class Usage:
     """
     prompt_tokens: int = 0
     completion_tokens: int = 0
+    # Prompt-cache accounting (Anthropic): cached reads bill at a fraction
+    # of the input rate, cache writes at a small premium. Zero for
+    # providers that don't report them.
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
 
     @property
     def total_tokens(self) -> int:
-        return self.prompt_tokens + self.completion_tokens
+        return (self.prompt_tokens + self.completion_tokens
+                + self.cache_read_input_tokens + self.cache_creation_input_tokens)
 
     def ensure_validity(self, prompt_text: str, completion_text: str):
         """
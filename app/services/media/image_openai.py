@@ -47,26 +47,32 @@ class OpenAIImageService:
     def __init__(self):
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
 
+        # Flatten the nested pricing table into final user prices in
+        # credits (margin and exchange rate pre-multiplied), so a request
+        # costs one dict lookup.
+        scale = self.PROFIT_MARGIN * self.USD_TO_CREDITS_RATE
+        self.credit_costs = {
+            (model, quality, size): (price * scale).quantize(Decimal("0.000001"))
+            for model, qualities in self.PRICING_TABLE.items()
+            for quality, sizes in qualities.items()
+            for size, price in sizes.items()
+        }
+        self._default_cost = (Decimal("0.040") * scale).quantize(Decimal("0.000001"))
+
     def calculate_cost(self, model: str, quality: str, size: str) -> Decimal:
         """
         Calculates User Cost in Credits.
         Handles both 'standard/hd' (dall-e-3) and 'low/medium/high' (gpt-image-1.5).
         """
-        model_pricing = self.PRICING_TABLE.get(model)
-        
-        # Fallback to defaults if model not found
-        if not model_pricing:
-            model_pricing = self.PRICING_TABLE["gpt-image-1.5"]
+        cost = self.credit_costs.get((model, quality, size))
+        if cost is not None:
+            return cost
 
-        # Default quality fallback depends on model
+        # Unknown combos fall back the same way the nested lookups did
+        model_key = model if model in self.PRICING_TABLE else "gpt-image-1.5"
         default_quality = "standard" if model == "dall-e-3" else "medium"
-        quality_pricing = model_pricing.get(quality, model_pricing.get(default_quality))
-        
-        # Get base price
-        base_price = quality_pricing.get(size, Decimal("0.040"))
-        
-        user_cost = base_price * self.PROFIT_MARGIN * self.USD_TO_CREDITS_RATE
-        return user_cost.quantize(Decimal("0.000001"))
+        quality_key = quality if quality in self.PRICING_TABLE[model_key] else default_quality
+        return self.credit_costs.get((model_key, quality_key, size), self._default_cost)
 
     async def generate_and_upload(
         self, 
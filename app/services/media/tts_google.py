@@ -16,6 +16,10 @@ class GoogleTTSService:
     PROFIT_MARGIN = Decimal("4.0")
     USD_TO_CREDITS_RATE = Decimal("10.0")
 
+    # Provider price, margin and exchange rate folded into one
+    # per-character credit rate at import time
+    CREDITS_PER_CHAR = PROVIDER_COST_PER_CHAR * PROFIT_MARGIN * USD_TO_CREDITS_RATE
+
     def __init__(self):
         # Authenticate using the JSON key file path from env
         self.credentials_path = settings.GOOGLE_APPLICATION_CREDENTIALS
@@ -41,11 +45,8 @@ class GoogleTTSService:
         Calculates the final cost in CREDITS for the user.
         Formula: (Chars * ProviderPrice * Margin) * ExchangeRate
         """
-        char_count = len(text)
-        cost_usd = Decimal(char_count) * self.PROVIDER_COST_PER_CHAR
-        price_to_user_usd = cost_usd * self.PROFIT_MARGIN
-        total_credits = price_to_user_usd * self.USD_TO_CREDITS_RATE
-        
+        total_credits = Decimal(len(text)) * self.CREDITS_PER_CHAR
+
         # Round to 6 decimal places
         return total_credits.quantize(Decimal("0.000001"))
 
@@ -37,6 +37,44 @@ class StorageService:
             logger.error(f"Failed to upload file to storage: {e}")
             raise e
 
+    def upload_fileobj(self, fileobj, destination_path: str, content_type: str) -> str:
+        """
+        Streams a file-like object to R2 (multipart under the hood) and
+        returns the public URL. Memory stays bounded by the part size
+        instead of the whole file.
+        """
+        try:
+            self.s3_client.upload_fileobj(
+                fileobj,
+                self.bucket,
+                destination_path,
+                ExtraArgs={"ContentType": content_type},
+            )
+
+            full_url = f"{self.public_base_url}/{destination_path}"
+            return full_url
+
+        except ClientError as e:
+            logger.error(f"Failed to upload file to storage: {e}")
+            raise e
+
+    def get_file_bytes(self, public_url: str) -> bytes | None:
+        """
+        Fetches an object's bytes from R2 using its public URL.
+        Returns None when the object is missing or the fetch fails.
+        """
+        if not public_url:
+            return None
+
+        try:
+            key = public_url.replace(f"{self.public_base_url}/", "")
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=key)
+            return response["Body"].read()
+
+        except ClientError as e:
+            logger.error(f"Failed to fetch file from storage: {e}")
+            return None
+
     def delete_file(self, public_url: str):
         """
         Deletes a file from R2 using its public URL.
@@ -58,5 +96,28 @@ class StorageService:
             logger.error(f"Failed to delete file from storage: {e}")
             pass
 
+    def delete_files(self, public_urls: list[str]):
+        """
+        Deletes several files from R2 in one DeleteObjects call
+        (up to 1000 keys per request).
+        """
+        keys = [
+            url.replace(f"{self.public_base_url}/", "")
+            for url in public_urls if url
+        ]
+        if not keys:
+            return
+
+        try:
+            self.s3_client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": k} for k in keys]},
+            )
+            logger.info(f"Deleted {len(keys)} files from storage")
+
+        except ClientError as e:
+            logger.error(f"Failed to batch-delete files from storage: {e}")
+            pass
+
 # Singleton instance
 storage = StorageService()
\ No newline at end of file
@@ -124,8 +124,9 @@ def generate_avatar_task(
     async def _async_process():
         async with async_session_maker() as db:
             try:
-                stmt = select(GeneratedVideo).where(GeneratedVideo.id == uuid.UUID(video_db_id))
-                video_record = (await db.execute(stmt)).scalar_one()
+                video_record = await db.get(GeneratedVideo, uuid.UUID(video_db_id))
+                if video_record is None:
+                    raise ValueError(f"Video record {video_db_id} not found")
             except Exception as e:
                 print(f"Error fetching video record: {e}")
                 return